@@ -32,24 +32,40 @@ Im nachfolgenden werden die Sensordaten über ein Netzwerk zu einem Broker (MQTT
 Zudem werden drei verschiedene Topic`s vom MQTT in diesem Code subscribe.
 Zwei Topic`s sind die für das erhalten der Grenzwerte für die Bodenfeuchtigkeit.
 Das dritte Topic ist für die Manuelle ansteuerung der Pumpe.
+Es können mehrere Bewässerungszonen (Sensor + Pumpe) angeschlossen werden,
+der optionale Schlüssel "zone" in den Nachrichten wählt die Zone (sonst Zone 0).
 
-Die Sensordaten werden alle 2 Sekunden zum MQTT gesendet um ein ca. Echtzeitwerden zu bilden.
-Alle 30 Sekunden werden diese Sensordaten für die Datenbank erneut gesendet"""
+Die Sensordaten werden jede Sekunde zum MQTT gesendet um ein ca. Echtzeitwerden zu bilden.
+Alle 60 Sekunden werden diese Sensordaten für die Datenbank erneut gesendet.
+Sensoren, Pumpen, Display, MQTT-Empfang und die beiden Sendeaufgaben laufen als
+eigene asyncio-Aufgaben, die beim Warten die anderen Aufgaben weiterlaufen lassen."""
 
 #----------------------------------------------------------------------------------------------------
 
 #--------------------------------------------Bibliotheken--------------------------------------------
 
-from machine import Pin, SPI, SoftI2C,ADC				 # Zugriff auf GPIO, SPI, I2C, ADC
+from machine import Pin, SPI, ADC						 # Zugriff auf GPIO, SPI, ADC
 import st7789py as st7789								 # Bibliothek für ST7789 TFT-Display
-import vga2_16x32 as font								 # Schriftart für das Display
+from packed_font import PackedFont						 # Schriftart aus einer Datei nachladen
+from screen import Screen								 # Merkt sich den Displayinhalt (nur Änderungen zeichnen)
+from trend import TrendStrip							 # Verlaufsanzeige mit Hardware-Scrolling
+from soil_sampler import SoilSampler					 # Bodenfeuchtigkeit per Timer abtasten und filtern
+from readings import Readings							 # Gemeinsame Messwerte aller Aufgaben
+from utime import ticks_ms, ticks_add, ticks_diff		 # Millisekunden-Zähler für die Termine der Aufgaben
+from irrigation import PumpController, Zone			 # Pumpen und Bewässerungszonen
+from i2c_bus import I2CBus								 # Gemeinsamer I2C-Bus mit Zeitmessung
 from ahtx0 import AHT20									 # Bibliothek für AHT21 (Temperatur)
-from ens_160 import ENS160								 # Bibliothek für ENS160 (Luftqualität)
-import time												 # Zeitsteuerung
+from ens160 import ENS160								 # Bibliothek für ENS160 (Luftqualität)
+import math												 # Aufrunden der Grenzwerte
 import json												 # Umwandeln auf JSON-Objekte 
 import network											 # Zugriff auf Netzwerkfunktionen
 from umqtt.simple import MQTTClient						 # Zugriff auf MQTT
 
+try:
+    import uasyncio as asyncio							 # Aufgaben, die beim Warten abgeben (MicroPython)
+except ImportError:
+    import asyncio										 # Auf dem PC (Werkzeuge/firmware_sim.py)
+
 #------------------------------------------------------------------------------------------------------
 
 #--------------------------------------------Initialisieren--------------------------------------------
@@ -71,31 +87,68 @@ tft = st7789.ST7789(
     cs = Pin(39, Pin.OUT),				 # Chip-Select
     dc = Pin(38, Pin.OUT),				 # Daten-/Command-Pin
     backlight = Pin(0, Pin.OUT),		 # Hintergrundbeleuchtung
-    rotation = 4)						 # Anzeigeausrichtung
+    rotation = 4,						 # Anzeigeausrichtung
+    color_mode = st7789.COLOR_444,		 # 12 Bit pro Pixel, 25 % weniger SPI-Daten
+    glyph_cache = 32 * 1024,			 # Speicher für fertig gezeichnete Zeichen (Bytes)
+    buffer_size = 4800)					 # Füllpuffer mit 4800 Pixeln zu 16 Bit (12 Schreibvorgänge pro Bild)
+
+# -Schriftart: nur die benutzten Zeichen aus vga2_16x32 (erstellt mit Werkzeuge/font_pack.py)
+
+font = PackedFont("vga2_16x32.fnt")
+
+anzeige = Screen(tft, font, height = 200)	 # Displayinhalt mit Textfeldern (je 14 Zeichen) oberhalb vom Verlauf
+anzeige.add_field("werte", 10, 40, 14)
+anzeige.add_field("temp", 10, 80, 14)
+anzeige.add_field("luft", 10, 120, 14)
+anzeige.add_field("boden", 10, 160, 14)
+anzeige.set_text("werte", "Werte:")		 # Wird erst beim ersten Farbwechsel gezeichnet
+
+# -Verlauf von Bodenfeuchtigkeit und Luftqualität (untere 120 Zeilen)
+#  Eine Zeile pro Messpunkt, alle 2 Minuten -> die letzten 4 Stunden
+
+verlauf = TrendStrip(tft, 200, 120)
+verlauf.add_series(st7789.BLUE, 0, 100)	 # Bodenfeuchtigkeit 0 - 100 %
+verlauf.add_series(st7789.RED, 400, 2000) # Luftqualität 400 - 2000 ppm
+VERLAUF_INTERVALL = 120000				 # Zeit zwischen zwei Messpunkten in ms
+verlauf_nummer = 0						 # Zählt die Messpunkte, die Displayaufgabe zeichnet jeden neuen
+verlauf_werte = None					 # Letzter Messpunkt (Bodenfeuchtigkeit, Luftqualität)
 
 # -I2C-Bus für ENS160 und AHT21
 
-i2c = SoftI2C(scl=Pin(7), sda=Pin(6))	 # Software-I2C
-sensor_ens160 = ENS160(i2c)				 # Initialisieren des ENS160 Sensors
-sensor_aht21 = AHT20(i2c)				 # Initialisieren des AHT21 Sensors
+i2c_bus = I2CBus(scl=Pin(7), sda=Pin(6), freq=400000)	 # Hardware-I2C mit 400 kHz (sonst Software-I2C)
+sensor_ens160 = ENS160(i2c_bus.device("ENS160", min_interval_ms = 900))	 # ENS160 liefert nur einmal pro Sekunde neue Werte, etwas kürzer als die Abfrage jede Sekunde
+sensor_aht21 = AHT20(i2c_bus.device("AHT21"), max_age_ms = 2000)	 # AHT21, Messwerte werden 2 Sekunden wiederverwendet
+print("Hardware-I2C:", i2c_bus.hardware)
 
-# -ADC Capacitive Soil Moisture Sensor V2
+# -Bewässerungszonen: je ein Capacitive Soil Moisture Sensor V2 (ADC-Pin) und eine Pumpe (Pin)
+#  Für weitere Zonen einfach weitere Paare eintragen, Zone 0 ist die bisherige Pflanze
 
-soil = ADC(Pin(10))						 # Variabel für den PIN 5 Eingang mit ADC (Analog-Digital-Converter)
-soil.atten(ADC.ATTN_11DB)				 # Lässt den Spannungsbereich 0 - 3.3V auf dem PIN 4 zu
-soil.width(ADC.WIDTH_12BIT)				 # Die Analogwerte werden in 12 Bit Auflösung: 0 - 4095
+ZONEN_PINS = [(10, 8)]					 # (ADC-Pin Bodenfeuchtigkeit, Pin Pumpe) pro Zone
 
-# -Variabel für Pumpe
+soil_sensoren = []
+for adc_pin, pumpen_pin in ZONEN_PINS:
+    soil = ADC(Pin(adc_pin))			 # ADC (Analog-Digital-Converter) der Zone
+    soil.atten(ADC.ATTN_11DB)			 # Lässt den Spannungsbereich 0 - 3.3V zu
+    soil.width(ADC.WIDTH_12BIT)			 # Die Analogwerte werden in 12 Bit Auflösung: 0 - 4095
+    soil_sensoren.append(soil)
 
-pumpe = Pin(8,Pin.OUT)					 # Pin für High(1) bzw Low(0) für die Pumpe
+# Messungen per Hardware-Timer, alle Zonen in einem Durchlauf, Median aus je 4 Werten,
+# 32 Werte ergeben einen gefilterten Wert pro Zone.
+# Die Abtastrate stellen die Pumpen ein (siehe unten).
+boden_abtastung = SoilSampler(soil_sensoren, timer_id = 0, rate_hz = 16, samples = 32, window = 4)
 
-pumpen_status = 'Kein Zustand vorhanden'
+# -Pumpen
 
-# -Globale Variabeln
+# Alle Pumpen aus: 16 Messungen pro Sekunde -> alle 2 Sekunden ein Wert
+# Eine Pumpe an: 128 Messungen pro Sekunde -> alle 0,25 Sekunden ein Wert
 
-oberergrenzwert = 0						 # Globale Variabel Wert 0 geben 
-unterergrenzwert = 0					 # Globale Variabel Wert 0 geben  
-pumpe_on = False						 # Globale Variabel auf False setzen
+pumpen = PumpController.create_group([Pin(pumpen_pin, Pin.OUT) for adc_pin, pumpen_pin in ZONEN_PINS],
+                                     boden_abtastung, idle_hz = 16, active_hz = 128)
+
+# -Zonen mit eigenen Grenzwerten (als ADC-Werte) und eigenem Zustand
+#  Ohne Grenzwerte vom MQTT bleiben die Pumpen aus
+
+zonen = [Zone(nummer, pumpe) for nummer, pumpe in enumerate(pumpen)]
 
 # WLAN-Verbindung herstellen
 SSID = "XXXX"				 # Wlan "Name"
@@ -103,16 +156,7 @@ PASSWORD = "XXXX"		 # Passwort des Wlan
 
 wlan = network.WLAN(network.STA_IF)		 # Wlan-Client erzeugen
 wlan.active(False)						 # Wlan Reset
-wlan.active(True)						 # Wlan einschalten
-
-if not wlan.isconnected():				 # Testen der WLAN Verbindung
-    wlan.connect(SSID, PASSWORD)		 # Mit dem Wlan verbinden
-    while not wlan.isconnected():
-        print("Verbinde mit WLAN...")	 # Wenn noch keine Verbindung hergestellt ist
-        time.sleep(1)
-
-
-print("WLAN verbunden:", wlan.ifconfig()) # Konfigurationsdaten vom Wlan
+wlan.active(True)						 # Wlan einschalten (verbunden wird in wlan_verbinden)
 
 # MQTT-Konfiguration
 BROKER = "192.168.178.122"  			 # IP-Adresse des Brokers (Laptop,PC)
@@ -126,6 +170,26 @@ TOPIC2 = b"Pumpe/EIN/AUS"				 # Topic für manuelle Ansteuerung
 
 #----------------------------------------------Funktionen---------------------------------------------
 
+# -Funktion: Warten, ohne das Programm anzuhalten; die anderen Aufgaben laufen weiter
+
+def warten(ms):
+    return asyncio.sleep(ms / 1000)
+
+# -Funktion: Warten bis zu einem Termin (Wert von ticks_ms)
+
+def warten_bis(termin):
+    return warten(max(0, ticks_diff(termin, ticks_ms())))
+
+# -Funktion: Nächster Termin einer Aufgabe, der Takt bleibt fest
+#  Hat die Aufgabe länger gedauert, werden verpasste Termine übersprungen (nicht nachgeholt)
+
+def naechster_termin(termin, periode):
+    termin = ticks_add(termin, periode)
+    jetzt = ticks_ms()
+    if ticks_diff(termin, jetzt) <= 0:
+        termin = ticks_add(jetzt, periode)
+    return termin
+
 # -Funktion für callback der Topic`s
 #  vergleichen vom MQTT topic und den Variabeln TOPIC
 
@@ -148,16 +212,21 @@ def sub_pumpe(topic, msg):				 # Funktion definieren
     print(daten)
     schalter = daten.get('Schalter')	 # Wert "ON" aus der Variabel "daten" erhalten
     print(schalter)
-    if schalter == 'ON':				 # Pumpe einschalten     
- 
-        global pumpe_on					 # Globale Variable definieren 
-         
-        pumpe_on = True					 # Globale Variable auf True setzen
-
-    else:								 # sonst ausschalten
-        global pumpe_on
-        
-        pumpe_on = False 				 # Globale Variable aus False setzen
+    zone = zone_aus_daten(daten)		 # Optional "zone", sonst Zone 0
+    if zone is None:
+        return
+    
+    zone.manual = schalter == 'ON'		 # ON: Pumpe manuell einschalten, sonst automatisch
+    pumpe_steuern(zone)
+
+# -Funktion: Zone aus der MQTT-Message, ohne "zone" die Zone 0
+
+def zone_aus_daten(daten):
+    nummer = daten.get('zone', 0)
+    if not isinstance(nummer, int) or not 0 <= nummer < len(zonen):
+        print("Unbekannte Zone:", nummer)
+        return None
+    return zonen[nummer]
 
 # -Funktion zur Auswertung der MQTT-Message vom Topic Obererschwellenwert
 
@@ -167,10 +236,11 @@ def sub_oberergrenzwert(topic, msg):	 # Funktion definieren
     print(daten)
     wert = daten.get('oberergrenzwert')	 # Wert aus der Variabel daten erhalten
     print("Wert:",wert)
+    zone = zone_aus_daten(daten)		 # Optional "zone", sonst Zone 0
     
-    global oberergrenzwert				 # Globale Variable definieren
-    
-    oberergrenzwert = wert				 # Globale Variabel nimmt den Wert von der Variabel Wert an
+    if zone is not None:
+        zone.upper_raw = rohwert_aus_prozent(wert)	 # Einmal in einen ADC-Wert umrechnen
+        pumpen_signal.set()						 # Pumpen mit dem neuen Grenzwert prüfen
 
 # -Funktion zur Auswertung der MQTT-Message vom Topic Untererschwellenwert
 
@@ -180,159 +250,353 @@ def sub_untergrenzwert(topic, msg):		 # Funktion definieren
     print(daten)
     wert = daten.get('unterergrenzwert') # Wert aus der Variabel daten erhalten 
     print("Wert:",wert)
+    zone = zone_aus_daten(daten)		 # Optional "zone", sonst Zone 0
     
-    global unterergrenzwert				 # Globale Variable definieren
-    
-    unterergrenzwert = wert				 # Globale Variabel nimmt den Wert von der Variabel Wert an
+    if zone is not None:
+        zone.lower_raw = rohwert_aus_prozent(wert)	 # Einmal in einen ADC-Wert umrechnen
+        pumpen_signal.set()						 # Pumpen mit dem neuen Grenzwert prüfen
+
+# -Umrechnung zwischen ADC-Wert und Prozent nur mit ganzen Zahlen
+#  Nass = 1,0 V und Trocken = 2,7 V werden einmal in ADC-Werte (0 - 4095 für 0 - 3,3 V) umgerechnet
 
-# -Funktion Spannung in Prozent umrechnen
-#  Eingabe: Spannung in Volt
-#  Rückgabe: Prozentualer Wert für die Feuchtigkeit (zwischen 0% und 100%)
+NASS_ROHWERT = int(1.0 / 3.3 * 4095)	 # 1240
+TROCKEN_ROHWERT = int(2.7 / 3.3 * 4095)	 # 3350
+ROHWERT_BEREICH = TROCKEN_ROHWERT - NASS_ROHWERT
 
-def prozentualerbereich(spannung, nass = 1.0, trocken = 2.7):			 # Bedinung für die Funktion definieren
-    prozent_spannung = (trocken - spannung) / (trocken - nass) * 100	 # Rechnung für den Prozentwert
-    return max(0, min(100, prozent_spannung))							 # Begrezung des Prozentwerts zwischen 0%-100%
+# -Funktion ADC-Wert in Prozent umrechnen
+#  Eingabe: ADC-Wert
+#  Rückgabe: Prozentualer Wert für die Feuchtigkeit (ganze Zahl zwischen 0% und 100%, gerundet)
 
-# -Funktionen zum Ein/Ausschalten der Pumpe
+def prozent_aus_rohwert(rohwert):
+    prozent = ((TROCKEN_ROHWERT - rohwert) * 100 + ROHWERT_BEREICH // 2) // ROHWERT_BEREICH	 # Rechnung für den Prozentwert
+    return max(0, min(100, prozent))									 # Begrezung des Prozentwerts zwischen 0%-100%
 
-def pumpe_ein():						 # Funktion definieren
-    pumpe.value(1)						 # Variable pumpe auf 1 setzen
+# -Funktion Grenzwert in Prozent in einen ADC-Wert umrechnen
+#  Rückgabe: größter ADC-Wert, bei dem prozent_aus_rohwert() >= prozent ist
+#  Damit gilt: prozent >= Grenzwert  <=>  rohwert <= rohwert_aus_prozent(Grenzwert)
 
-def pumpe_aus():						 # Funktion definieren
-    pumpe.value(0)						 # Variable pumpe auf 0 setzen
+def rohwert_aus_prozent(prozent):
+    prozent = math.ceil(prozent)										 # Prozentwerte sind ganze Zahlen
+    if prozent <= 0:
+        return 4095														 # Jeder Wert erreicht 0 %
+    if prozent > 100:
+        return -1														 # Kein Wert erreicht mehr als 100 %
+    return TROCKEN_ROHWERT - (prozent * ROHWERT_BEREICH - ROHWERT_BEREICH // 2 + 99) // 100
+
+# -Funktion Hundertstel (Temperatur, Luftfeuchtigkeit) auf ganze Zahl runden, für das Display
+
+def ganzzahl(hundertstel):
+    return (hundertstel + 50) // 100
+
+# -Funktion für den Pumpenzustand einer Zone als Text (für MQTT)
+
+def pumpen_status(zone):				 # Funktion definieren
+    if zone.pump.running:
+        return 'Pumpe ist Eingeschaltet'
+    return 'Pumpe ist Ausgeschaltet'
 
 # -Funktion für Displayfarbe und Displaytext 
 
-def display_farbe(st_farbe, temp, co2, prozent):									 # Funktion definieren
+#  Wird von der Displayaufgabe aufgerufen, nur dort wird gezeichnet.
+#  bild: (Farbe, Temperatur, CO², Bodenfeuchtigkeit, Messpunktnummer, Messpunkt)
+#  Es werden nur die Zeichen neu gezeichnet, die sich geändert haben.
+#  Das ganze Display wird nur neu gefüllt, wenn sich die Farbe ändert.
+
+gezeichneter_messpunkt = 0				 # Nummer des zuletzt gezeichneten Messpunkts (nur in der Displayaufgabe)
+
+def display_farbe(bild):															 # Funktion definieren
     
-    tft.fill(st_farbe)
-    tft.text(font, "Werte:", 10, 40, st7789.BLACK, st_farbe)
-    tft.text(font, "Temp:{} C".format(temp), 10, 80, st7789.BLACK, st_farbe)
-    tft.text(font, "Luft:{} ppm".format(co2), 10, 120, st7789.BLACK, st_farbe)
+    global gezeichneter_messpunkt
     
-    tft.fill_rect(10, 160, 200, 32, st_farbe)										 # Löscht den alten Textbereich
-    tft.text(font, "Boden:{} %".format(prozent), 10, 160, st7789.BLACK, st_farbe)
+    st_farbe, temp, co2, prozent, nummer, messpunkt = bild							 # Zustand aus dem Schnappschuss
+    
+    with tft.transaction():															 # Chip-Select bleibt für das ganze Bild aktiv
+        anzeige.background(st_farbe)												 # Füllt das Display nur bei Farbwechsel
+        anzeige.set_text("temp", "Temp:{} C".format(temp))
+        anzeige.set_text("luft", "Luft:{} ppm".format("--" if co2 is None else co2))	 # Vor dem ersten ENS160-Wert "--"
+        anzeige.set_text("boden", "Boden:{} %".format(prozent))
+        
+        if nummer != gezeichneter_messpunkt:										 # Neuer Messpunkt für den Verlauf
+            verlauf.append(*messpunkt)												 # Eine Zeile zeichnen und weiterscrollen
+            gezeichneter_messpunkt = nummer
 
-# MQTT-Client einrichten
+# MQTT-Client einrichten (verbunden wird in mqtt_verbinden)
 
 client = MQTTClient(CLIENT_ID, BROKER, PORT, keepalive = 30)
 client.set_callback(mqtt_callback)
-client.connect()
-print("Mit MQTT-Broker verbunden.")
-
-client.subscribe(TOPIC2)
-client.subscribe(TOPIC5)
-client.subscribe(TOPIC4)
 
 
 
 #---------------------------------------------Hauptprogramm--------------------------------------------
 
-startzeit = time.ticks_ms()										 # Zeitstartpunkt für Time Ticks deffinieren
-startzeit2 = time.ticks_ms()									 # Zeitstartpunkt für Time Ticks deffinieren
-
-tft.fill(st7789.WHITE)											 # Hintergrund des TFT-Displays weiß leuchten lassen
-
-while True:														 # Dauerschleife zur regelmäßigen Datenerfassung    
-    client.check_msg() 											 # Warten, bis eine neue Nachricht vorliegt.
-
-    aktuellezeit = time.ticks_ms()
-    #------- Abfragen der Sensoren-------
-    spannung = soil.read() / 4095 * 3.3								 # Bodenfeuchtigkeit in Volt umrechnen        
-    prozent = round (prozentualerbereich(spannung),0)				 # Umrechnung in Prozent        
-    co2 = sensor_ens160.get_eco2()									 # CO²-Messung (eCO²) vom ENS160        
-    temp = round(sensor_aht21.temperature,0)						 # Temperatur vom AHT21
+# Jede Aufgabe ist eine asyncio-Aufgabe und wartet mit await auf ihren Timer oder ein Signal,
+# solange laufen die anderen Aufgaben. Die Sensoraufgaben legen ihre Werte in "messwerte" ab,
+# Pumpe, Display und MQTT lesen nur noch von dort.
+
+messwerte = Readings()											 # Letzte Messwerte aller Sensoren
+pumpen_signal = asyncio.Event()									 # Neue Bodenwerte oder Grenzwerte: Pumpen prüfen
+neues_bild = asyncio.Event()									 # Neues Bild für das Display
+bild = None														 # Neuestes Bild, ältere werden nicht mehr gezeichnet
+boden_periode = 500												 # Bei laufender Pumpe 50 ms (siehe pumpe_steuern)
+boden_wecken = asyncio.Event()									 # boden_periode hat sich geändert
+
+# -Aufgabe: Funktion alle "periode" ms aufrufen, das erste Mal nach "verzoegerung" ms
+#  Die Termine liegen fest, die Laufzeit der Funktion verschiebt den Takt nicht
+
+async def alle(periode, funktion, verzoegerung = 0):
+    termin = ticks_add(ticks_ms(), verzoegerung)
+    while True:
+        await warten_bis(termin)
+        funktion()
+        termin = naechster_termin(termin, periode)
+
+# -Funktion: gefilterten Wert der Bodenfeuchtigkeit abholen (alle 0,5 Sekunden neu)
+
+def boden_lesen():
+    rohwerte = boden_abtastung.read()							 # Gefilterte ADC-Werte aller Zonen, einmal pro Periode
+    if rohwerte is not None:
+        for zone in zonen:
+            zone.raw = rohwerte[zone.channel]
+        messwerte.set("rohwert", rohwerte[0])					 # Zone 0 für Display und Verlauf
+        messwerte.set("prozent", prozent_aus_rohwert(rohwerte[0]))	 # Umrechnung in Prozent
+        pumpen_signal.set()										 # Pumpen sofort mit den neuen Werten prüfen
+
+# -Aufgabe: Bodenfeuchtigkeit, bei laufender Pumpe öfter
+
+async def boden_aufgabe():
+    termin = ticks_ms()
+    while True:
+        boden_lesen()
+        boden_wecken.clear()
+        periode = boden_periode
+        termin = naechster_termin(termin, periode)
+        while ticks_diff(termin, ticks_ms()) > 0:
+            try:
+                await asyncio.wait_for(boden_wecken.wait(), ticks_diff(termin, ticks_ms()) / 1000)
+            except asyncio.TimeoutError:
+                break
+            boden_wecken.clear()
+            termin = ticks_add(termin, boden_periode - periode)	 # Neue Periode gilt sofort, Termin vorziehen
+            periode = boden_periode
+
+# -Funktion: CO²-Messung (eCO²) vom ENS160, liefert einmal pro Sekunde neue Werte
+
+def ens160_lesen():
+    messwerte.set("co2", sensor_ens160.get_eco2())
+
+# -Aufgabe: AHT21 alle 2 Sekunden, während der Messung laufen die anderen Aufgaben weiter
+
+async def aht21_aufgabe():
+    while True:
+        sensor_aht21.start_measurement()						 # Messung starten (dauert ca. 80 ms)
+        await warten(80)
+        while not sensor_aht21.measurement_ready():				 # Noch nicht fertig (nur Statusbyte lesen)
+            await warten(10)
+        feuchte, temp = sensor_aht21.read_measurement(fixed = True)	 # Luftfeuchtigkeit und Temperatur in Hundertstel
+        messwerte.set("feuchte", feuchte)
+        messwerte.set("temp", temp)
+        await warten(2000)
+
+# -Aufgabe: Pumpen EIN/AUS Automatisch oder Manuell
+#  Jede Zone vergleicht ihren ADC-Wert mit ihren Grenzwerten (Zone.update)
+#  Beim Abschalten am Obererschwellenwert werden Verzögerung und Überschwingen gemerkt
+
+def pumpe_steuern(zone = None):
     
-    #--------Daten für MQTT bereit machen und senden--------
-        
-    sensor_daten = {"Bodenfeuchtigkeit": prozent, "Luftqualitaet": co2, "Temperatur": temp, "Pumpe": pumpen_status}	 # Sensor daten für JSON vorbereiten
-        
-    json_string = json.dumps(sensor_daten)														 # Json-String erstellen
+    global boden_periode
     
-    #--------Pumpe EIN/AUS Automatisch oder Manuell--------
-            
-    if pumpe_on is False :											 # Bedingung der globalen Variabel
-        
-        if prozent >= oberergrenzwert:								 # Bodenfeuchtigkeit über 60%
-            pumpe_aus()												 # pumpe auf 0 setzen
-            pumpen_status = 'Pumpe ist Ausgeschaltet'
-    
-        elif prozent < unterergrenzwert:							 # Vergleichen von prozent und Unterergrenzwert 
-            pumpe_ein()												 # pumpe auf 1 setzen
-            pumpen_status = 'Pumpe ist Eingeschaltet'    
-    else:															 # Sonst andere Bedingungen
-        if pumpe_on:
-            pumpe_ein()												 # Funktion ausführen
-            pumpen_status = 'Pumpe ist Eingeschaltet'
-            
-        else:
-            pumpe_aus()												 # Funktion ausführen
-            pumpen_status = 'Pumpe ist Ausgeschaltet'
-            
-    #--------Senden der Sensordaten für die Datenbank------
+    for z in zonen if zone is None else (zone,):
+        z.update()												 # Pumpe der Zone schalten
     
-    if time.ticks_diff(aktuellezeit, startzeit2) >= 60000:			 # Zeit festlegen 60 Sekunden
-        
-        # Versuch von daten als JSON Format zum Brokker zu senden  
-        try:
-            
-            client.publish(TOPIC3, json_string)						 # Nachricht an MQTT senden
-            print(f"Nachricht gesendet Datenbank: {json_string}")
-        
-        # Fehlermeldung beim Senden der MQTT-Nachricht ausgeben
+    # Läuft eine Pumpe, neue Bodenwerte sofort abholen, sonst alle 500 ms
+    periode = 500
+    for z in zonen:
+        if z.pump.running:
+            periode = 50
+    if periode != boden_periode:
+        boden_periode = periode
+        boden_wecken.set()										 # Bodenaufgabe wartet nicht mehr die alte Periode ab
+
+# -Aufgabe: Pumpen schalten, sobald neue Bodenwerte oder Grenzwerte da sind
+
+async def pumpen_aufgabe():
+    while True:
+        await pumpen_signal.wait()
+        pumpen_signal.clear()
+        pumpe_steuern()
+
+# -Funktion: Sensordaten als JSON-String für MQTT
+
+#  Eine Nachricht für alle Zonen: die Werte von Zone 0 bleiben wie bisher oben (für Node-RED),
+#  unter "Zonen" stehen Bodenfeuchtigkeit und Pumpe jeder Zone
+
+def sensor_json():
+    # Temperatur wie bisher in ganzen Grad (Node-RED und Datenbank), Luftfeuchtigkeit als Kommazahl
+    sensor_daten = {"Bodenfeuchtigkeit": messwerte.get("prozent"), "Luftqualitaet": messwerte.get("co2"),
+                    "Temperatur": ganzzahl(messwerte.get("temp")), "Luftfeuchtigkeit": messwerte.get("feuchte") / 100,
+                    "Pumpe": pumpen_status(zonen[0]),
+                    "Zonen": [{"zone": zone.channel, "Bodenfeuchtigkeit": prozent_aus_rohwert(zone.raw),
+                               "Pumpe": pumpen_status(zone)} for zone in zonen]}	 # Sensor daten für JSON vorbereiten
+    return json.dumps(sensor_daten)											 # Json-String erstellen
+
+# -Funktion: Nachricht an MQTT senden, bei Fehlern neu verbinden
+
+def mqtt_senden(topic, json_string):
+    
+    # Versuch von daten als JSON Format zum Brokker zu senden  
+    try:
         
-        except OSError as e:
-            print("Fehler beim Senden der MQTT-Nachricht:", e)
-            
-            #Versuch eine erneute Verbindung zum Brokker herzustellen
-            
-            try:
-                client.connect()
-                print("Erneut mit MQTT-Broker verbunden.")
-                
-            except:
-                print("Wiederverbindung zum Broker fehlgeschlagen.")
-            
-        startzeit2 = aktuellezeit									 # Startzeit zurücksetzen
-                
-    #--------Senden der Sensordaten für die Echtzeitanzeige------
+        client.publish(topic, json_string)						 # Nachricht an MQTT senden
+        return True
     
-    if time.ticks_diff(aktuellezeit, startzeit) >= 1000:			 # Messung jede Sekunden ausführen
+    # Fehlermeldung beim Senden der MQTT-Nachricht ausgeben
     
-        print("Luftqualität",co2,"%","Temperatur", temp,"°C","Spannung",
-              round(spannung,2),"V","Bodenfeuchte",round (prozent,2),"%")	 # Werte zur Kontrolle in der Kommandozeile ausgeben
-        print("")															 # Leere Spalte in Komandozeile einfügen
+    except OSError as e:
+        print("Fehler beim Senden der MQTT-Nachricht:", e)
         
-        #--------Displayfarbe bestimmen--------
+        #Versuch eine erneute Verbindung zum Brokker herzustellen
         
-        if co2 < 600:														 # CO²-Wertebereich bis 600ppm            
-            display_farbe(st7789.GREEN, temp, co2, prozent)					 # Displayfarbe Grün (CO²-Wert ist Gut)
-            
-        elif co2 < 1000:													 # CO²-Wertebereich von 601 bis 1000ppm
-            display_farbe(st7789.YELLOW, temp, co2, prozent)				 # Displayfarbe Gelb (CO²-Wert ist Okay)
-            
-        else:																 # CO²-Wertebereich über 1000ppm
-            display_farbe(st7789.RED, temp, co2, prozent)					 # Displayfarbe Rot (CO²-Wert ist Schlecht)
-
-         
-        # Versuch von daten als JSON Format zum Brokker zu senden  
         try:
+            client.connect()
+            print("Erneut mit MQTT-Broker verbunden.")
             
-            client.publish(TOPIC1, json_string)						 # Nachricht an MQTT senden
-            print(f"Nachricht gesendet: {json_string}")
+        except:
+            print("Wiederverbindung zum Broker fehlgeschlagen.")
+    return False
+
+# -Funktion: Neuen Messpunkt für den Verlauf merken, alle 2 Minuten
+
+def verlauf_merken():
+    
+    global verlauf_werte, verlauf_nummer
+    
+    co2 = messwerte.get("co2")
+    if co2 is None:													 # Noch kein Wert vom ENS160, kein Messpunkt
+        return
+    verlauf_werte = (messwerte.get("prozent"), co2)					 # Wird mit dem nächsten Bild gezeichnet
+    verlauf_nummer += 1
+
+# -Funktion: Senden der Sensordaten für die Datenbank, alle 60 Sekunden
+
+def datenbank_senden():
+    json_string = sensor_json()
+    if mqtt_senden(TOPIC3, json_string):
+        print(f"Nachricht gesendet Datenbank: {json_string}")
+    print(i2c_bus.report())										 # Zeitbedarf der Sensoren auf dem I2C-Bus
+    for zone in zonen:
+        print("Pumpe Zone", zone.channel, zone.pump.stats())	 # Verzögerung (ms) und Überschwingen (ADC-Werte) beim Abschalten
+
+# -Funktion: Neues Bild für das Display, jede Sekunde (auch ohne WLAN und MQTT)
+
+def bild_erstellen():
+    
+    global bild
+    
+    temp = ganzzahl(messwerte.get("temp"))								 # Ganze Grad für das Display
+    co2 = messwerte.get("co2")
+    prozent = messwerte.get("prozent")
+    spannung = messwerte.get("rohwert") * 3300 // 4095					 # Spannung in mV
+    
+    print("Luftqualität",co2,"%","Temperatur", temp,"°C","Spannung",
+          spannung / 1000,"V","Bodenfeuchte",prozent,"%")					 # Werte zur Kontrolle in der Kommandozeile ausgeben
+    print("")															 # Leere Spalte in Komandozeile einfügen
+    
+    #--------Displayfarbe bestimmen--------
+    
+    if co2 is None:														 # Noch kein Wert vom ENS160 (erste Sekunde)
+        st_farbe = st7789.WHITE											 # Displayfarbe Weiß wie beim Start
         
-        # Fehlermeldung beim Senden der MQTT-Nachricht ausgeben
+    elif co2 < 600:														 # CO²-Wertebereich bis 600ppm            
+        st_farbe = st7789.GREEN											 # Displayfarbe Grün (CO²-Wert ist Gut)
         
-        except OSError as e:
-            print("Fehler beim Senden der MQTT-Nachricht:", e)
-            
-            #Versuch eine erneute Verbindung zum Brokker herzustellen
-            
-            try:
-                client.connect()
-                print("Erneut mit MQTT-Broker verbunden.")
-                
-            except:
-                print("Wiederverbindung zum Broker fehlgeschlagen.") 
+    elif co2 < 1000:													 # CO²-Wertebereich von 601 bis 1000ppm
+        st_farbe = st7789.YELLOW										 # Displayfarbe Gelb (CO²-Wert ist Okay)
         
-        startzeit = aktuellezeit									 # Startzeit zurücksetzen
\ No newline at end of file
+    else:																 # CO²-Wertebereich über 1000ppm
+        st_farbe = st7789.RED											 # Displayfarbe Rot (CO²-Wert ist Schlecht)
+    
+    # Schnappschuss an die Displayaufgabe übergeben, gezeichnet wird dort
+    bild = (st_farbe, temp, co2, prozent, verlauf_nummer, verlauf_werte)
+    neues_bild.set()
+
+# -Funktion: Sensordaten für die Echtzeitanzeige senden, jede Sekunde
+
+def echtzeit_senden():
+    json_string = sensor_json()
+    if mqtt_senden(TOPIC1, json_string):
+        print(f"Nachricht gesendet: {json_string}")
+
+# -Aufgabe: Display zeichnen, sobald ein neues Bild da ist
+
+async def anzeige_aufgabe():
+    while True:
+        await neues_bild.wait()
+        neues_bild.clear()
+        display_farbe(bild)										 # Immer das neueste Bild
+
+# -Aufgabe: MQTT-Nachrichten abholen
+#  check_msg() wartet nicht, dazwischen laufen 50 ms lang die anderen Aufgaben
+
+async def mqtt_aufgabe():
+    while True:
+        client.check_msg()										 # Neue MQTT-Nachrichten verarbeiten
+        await warten(50)
+
+# -Funktion: WLAN-Verbindung herstellen, die anderen Aufgaben laufen solange weiter
+
+async def wlan_verbinden():
+    if not wlan.isconnected():				 # Testen der WLAN Verbindung
+        wlan.connect(SSID, PASSWORD)		 # Mit dem Wlan verbinden
+        while not wlan.isconnected():
+            print("Verbinde mit WLAN...")	 # Wenn noch keine Verbindung hergestellt ist
+            await warten(1000)
+    
+    print("WLAN verbunden:", wlan.ifconfig()) # Konfigurationsdaten vom Wlan
+
+# -Funktion: Mit dem MQTT-Broker verbinden und die Topic`s abonnieren
+
+def mqtt_verbinden():
+    client.connect()
+    print("Mit MQTT-Broker verbunden.")
+    
+    client.subscribe(TOPIC2)
+    client.subscribe(TOPIC5)
+    client.subscribe(TOPIC4)
+
+# -Start: erste Messwerte, dann alle Aufgaben
+
+async def main():
+    
+    for zone in zonen:
+        zone.raw = soil_sensoren[zone.channel].read()			 # Erster Wert, bis der gefilterte Wert vorliegt
+    messwerte.set("rohwert", zonen[0].raw)
+    messwerte.set("prozent", prozent_aus_rohwert(zonen[0].raw))
+    boden_abtastung.start()										 # Timer für die Bodenfeuchtigkeit starten
+    
+    feuchte, temp = sensor_aht21.measure(fixed = True)			 # Erste Messung abwarten, danach in der Aufgabe
+    messwerte.set("feuchte", feuchte)
+    messwerte.set("temp", temp)
+    ens160_lesen()
+    
+    tft.fill(st7789.WHITE)										 # Hintergrund des TFT-Displays weiß leuchten lassen
+    verlauf.clear()												 # Scrollbereich für den Verlauf einrichten
+    
+    # Sensoren, Pumpen, Display und Verlauf laufen schon während der WLAN-Verbindung
+    aufgaben = [asyncio.create_task(boden_aufgabe()),			 # Bei laufender Pumpe alle 50 ms
+                asyncio.create_task(aht21_aufgabe()),			 # Alle 2 Sekunden
+                asyncio.create_task(alle(1000, ens160_lesen)),	 # ENS160 liefert einmal pro Sekunde
+                asyncio.create_task(pumpen_aufgabe()),			 # Sobald neue Werte da sind
+                asyncio.create_task(alle(1000, bild_erstellen, 1000)),	 # Neues Bild jede Sekunde
+                asyncio.create_task(anzeige_aufgabe()),			 # Sobald ein neues Bild da ist
+                asyncio.create_task(alle(VERLAUF_INTERVALL, verlauf_merken, VERLAUF_INTERVALL))]	 # Verlauf alle 2 Minuten
+    
+    await wlan_verbinden()
+    mqtt_verbinden()
+    
+    aufgaben.append(asyncio.create_task(mqtt_aufgabe()))		 # MQTT-Nachrichten alle 50 ms abholen
+    aufgaben.append(asyncio.create_task(alle(1000, echtzeit_senden, 1000)))	 # MQTT jede Sekunde
+    aufgaben.append(asyncio.create_task(alle(60000, datenbank_senden, 60000)))	 # Datenbank alle 60 Sekunden
+    
+    await asyncio.gather(*aufgaben)								 # Läuft für immer
+
+asyncio.run(main())												 # Dauerschleife zur regelmäßigen Datenerfassung
@@ -33,7 +33,19 @@ from micropython import const
 
 
 class AHT10:
-    """Interface library for AHT10/AHT20 temperature+humidity sensors"""
+    """Interface library for AHT10/AHT20 temperature+humidity sensors
+
+    One measurement returns humidity and temperature. The result is cached
+    and reused by measure() and the properties while it is younger than
+    max_age_ms, with the default of 0 every read measures again.
+
+    measure() waits for the conversion. To do other work meanwhile, use
+    start_measurement(), poll measurement_ready() and collect the result
+    with read_measurement().
+
+    With fixed=True both return integers in hundredths of a percent and of a
+    degree, converted without any float arithmetic.
+    """
 
     AHTX0_I2CADDR_DEFAULT = const(0x38)  # Default I2C address
     AHTX0_CMD_INITIALIZE = 0xE1  # Initialization command
@@ -42,16 +54,22 @@ class AHT10:
     AHTX0_STATUS_BUSY = const(0x80)  # Status bit for busy
     AHTX0_STATUS_CALIBRATED = const(0x08)  # Status bit for calibrated
 
-    def __init__(self, i2c, address=AHTX0_I2CADDR_DEFAULT):
+    def __init__(self, i2c, address=AHTX0_I2CADDR_DEFAULT, max_age_ms=0):
         utime.sleep_ms(20)  # 20ms delay to wake up
         self._i2c = i2c
         self._address = address
         self._buf = bytearray(6)
+        self._status_buf = memoryview(self._buf)[0:1]
+        self.max_age_ms = max_age_ms
+        self.measuring = False
         self.reset()
         if not self.initialize():
             raise RuntimeError("Could not initialize")
         self._temp = None
         self._humidity = None
+        self._raw_humidity = 0
+        self._raw_temp = 0
+        self._measured = None
 
     def reset(self):
         """Perform a soft-reset of the AHT"""
@@ -73,26 +91,93 @@ class AHT10:
     @property
     def status(self):
         """The status byte initially returned from the sensor, see datasheet for details"""
-        self._read_to_buffer()
+        self._i2c.readfrom_into(self._address, self._status_buf)
         return self._buf[0]
 
     @property
     def relative_humidity(self):
         """The measured relative humidity in percent."""
-        self._perform_measurement()
-        self._humidity = (
-            (self._buf[1] << 12) | (self._buf[2] << 4) | (self._buf[3] >> 4)
-        )
-        self._humidity = (self._humidity * 100) / 0x100000
-        return self._humidity
+        return self.measure()[0]
 
     @property
     def temperature(self):
         """The measured temperature in degrees Celcius."""
+        return self.measure()[1]
+
+    def measure(self, max_age_ms=None, fixed=False):
+        """Measure humidity and temperature in one conversion.
+
+        A cached result younger than max_age_ms is returned without talking
+        to the sensor. Without max_age_ms the max_age_ms given to the
+        constructor is used, 0 always measures.
+
+        Returns a tuple of the relative humidity in percent and the
+        temperature in degrees Celcius, with fixed=True as integers in
+        hundredths.
+        """
+        if max_age_ms is None:
+            max_age_ms = self.max_age_ms
+        if (
+            max_age_ms
+            and self._measured is not None
+            and utime.ticks_diff(utime.ticks_ms(), self._measured) < max_age_ms
+        ):
+            return self._result(fixed)
+
         self._perform_measurement()
-        self._temp = ((self._buf[3] & 0xF) << 16) | (self._buf[4] << 8) | self._buf[5]
-        self._temp = ((self._temp * 200.0) / 0x100000) - 50
-        return self._temp
+        self._decode()
+        return self._result(fixed)
+
+    def start_measurement(self):
+        """Trigger a conversion and return without waiting for it."""
+        self._trigger_measurement()
+        self.measuring = True
+
+    def measurement_ready(self):
+        """Poll the conversion started by start_measurement().
+
+        Reads only the status byte. Returns True when the result can be
+        collected with read_measurement(), False while the sensor is busy or
+        no conversion was started.
+        """
+        if not self.measuring:
+            return False
+        return not self.status & self.AHTX0_STATUS_BUSY
+
+    def read_measurement(self, fixed=False):
+        """Collect the result of a finished conversion.
+
+        Returns a tuple of the relative humidity in percent and the
+        temperature in degrees Celcius, like measure(). The result is also
+        cached for measure() and the properties.
+        """
+        if not self.measuring:
+            raise RuntimeError("No measurement started")
+        self._read_to_buffer()
+        self.measuring = False
+        self._decode()
+        return self._result(fixed)
+
+    def _decode(self):
+        """Store the 20 bit raw values of the buffer"""
+        self._measured = utime.ticks_ms()
+        self._raw_humidity = (
+            (self._buf[1] << 12) | (self._buf[2] << 4) | (self._buf[3] >> 4)
+        )
+        self._raw_temp = ((self._buf[3] & 0xF) << 16) | (self._buf[4] << 8) | self._buf[5]
+
+    def _result(self, fixed):
+        """Scale the raw values, in hundredths if fixed"""
+        if fixed:
+            # 10000 / 2**20 = 625 / 2**16 and 20000 / 2**20 = 625 / 2**15,
+            # the products stay below 2**30 and fit a small int
+            return (
+                (self._raw_humidity * 625) >> 16,
+                ((self._raw_temp * 625) >> 15) - 5000,
+            )
+        self._humidity = (self._raw_humidity * 100) / 0x100000
+        self._temp = ((self._raw_temp * 200.0) / 0x100000) - 50
+        return self._humidity, self._temp
 
     def _read_to_buffer(self):
         """Read sensor data to buffer"""
@@ -113,6 +198,7 @@ class AHT10:
     def _perform_measurement(self):
         """Trigger measurement and write result to buffer"""
         self._trigger_measurement()
+        self.measuring = False
         self._wait_for_idle()
         self._read_to_buffer()
 
@@ -1,9 +1,21 @@
 from machine import I2C
 
+_DATA_STATUS = 0x20
+_NEWDAT = 0x02
+
 class ENS160:
     def __init__(self, i2c, address=0x53):
         self.i2c = i2c
         self.address = address
+        self._data = bytearray(6)  # DATA_STATUS (0x20) to DATA_ECO2 (0x25)
+        self.status = 0
+        self.aqi = None  # None until the first sample (NEWDAT) was read
+        self.tvoc = None
+        self.eco2 = None
+        clear_on_read = getattr(i2c, "clear_on_read", None)
+        if clear_on_read is not None:
+            # reading DATA_STATUS clears NEWDAT, the bus layer must not replay it
+            clear_on_read[_DATA_STATUS] = _NEWDAT
         self.set_mode(0x02)
 
     def _read_register(self, reg, length):
@@ -23,6 +35,22 @@ class ENS160:
         data = self._read_register(0x02, 2)  # Firmware Version
         return (data[0] << 8) | data[1]
 
+    def update(self):
+        # One burst read of DATA_STATUS to DATA_ECO2. The values are decoded
+        # only if NEWDAT is set, otherwise the cached ones stay valid.
+        # Returns True if new values were read. How often the bus is actually
+        # read is up to the I2C bus layer (i2c_bus.I2CDevice.min_interval_ms),
+        # a read it answers from the last result has NEWDAT cleared.
+        data = self._data
+        self.i2c.readfrom_mem_into(self.address, _DATA_STATUS, data)
+        self.status = data[0]
+        if not data[0] & _NEWDAT:
+            return False
+        self.aqi = data[1] & 0x07  # Extract the lower 3 bits
+        self.tvoc = (data[3] << 8) | data[2]  # LSB first, then MSB
+        self.eco2 = (data[5] << 8) | data[4]
+        return True
+
     def get_status(self):
         data = self._read_register(0x20, 1)  # Operating Mode
         return data[0]
@@ -38,12 +66,13 @@ class ENS160:
         return tvoc
 
     def get_eco2(self):
-        data = self._read_register(0x24, 2)  # Equivalent CO2 Concentration (ppm)
-        eco2 = (data[1] << 8) | data[0]  # LSB first, then MSB
-        return eco2
+        self.update()
+        return self.eco2  # Equivalent CO2 Concentration (ppm), None before the first sample
 
     def interpret_eco2_level(self, eco2):
-        if eco2 > 1500:
+        if eco2 is None:
+            return "Unknown"
+        elif eco2 > 1500:
             return "Bad - Heavily contaminated indoor air / Ventilation required"
         elif eco2 > 1000:
             return "Poor - Contaminated indoor air / Ventilation recommended"
@@ -57,7 +86,9 @@ class ENS160:
             return "Unknown"
 
     def interpret_tvoc_level(self, tvoc):
-        if tvoc <= 50:
+        if tvoc is None:
+            return "Unknown"
+        elif tvoc <= 50:
             return "Excellent"
         elif tvoc <= 100:
             return "Good"
@@ -71,9 +102,10 @@ class ENS160:
             return "Hazardous"
 
     def read_air_quality(self):
-        aqi = self.get_aqi()
-        tvoc = self.get_tvoc()
-        eco2 = self.get_eco2()
+        self.update()
+        aqi = self.aqi
+        tvoc = self.tvoc
+        eco2 = self.eco2
         eco2_rating = self.interpret_eco2_level(eco2)
         tvoc_rating = self.interpret_tvoc_level(tvoc)
         return aqi, tvoc, eco2, eco2_rating, tvoc_rating
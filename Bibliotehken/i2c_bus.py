@@ -0,0 +1,262 @@
+"""
+Shared I2C bus with per-device timing statistics.
+
+I2CBus opens the hardware I2C controller at the given clock speed and only
+falls back to the bit-banged SoftI2C if the port can not provide one. Each
+sensor driver gets its own I2CDevice from device(). It has the I2C methods
+the drivers use, so drivers take it in place of an I2C object. All
+transactions of all devices are serialised by one lock, on ports with
+threads, and each one is timed. The counters show which device the
+acquisition time goes to.
+
+Transactions are scheduled per device with a minimum interval. A device
+given min_interval_ms answers a read from its last result while that
+result is younger than the interval, without touching the bus. A sensor
+that produces new data only once per second is then read at most once per
+second however often its driver is asked. Any write to the device drops
+the kept results. Status bits the device clears when they are read, like a
+data-ready flag, are registered in clear_on_read and are cleared in the
+kept result, so a replayed read never reports the same data as new twice.
+The interval should be shorter than the period the driver is polled at,
+otherwise timing jitter answers regular polls from the kept result.
+
+Example:
+
+    bus = I2CBus(scl=Pin(7), sda=Pin(6), freq=400000)
+    sensor = ENS160(bus.device("ENS160", min_interval_ms=900))
+    print(bus.report())
+
+"""
+
+try:
+    import _thread
+except ImportError:
+    # port without threads, nothing to serialise
+    _thread = None
+
+import utime
+from machine import I2C, SoftI2C
+
+
+class _NoLock:
+    """Stands in for the bus lock on ports without threads."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class I2CDevice:
+    """
+    I2C methods of a bus with timing statistics for one device
+
+    Args:
+        bus (I2CBus): bus the device is attached to **Required**
+        name (str): name used in the statistics **Required**
+        min_interval_ms (int): reads of the same data within this time are
+            answered from the last result, 0 always reads the bus
+
+    Attributes:
+        clear_on_read (dict): register: mask of status bits the device
+            clears when the register is read first in a transaction, the
+            drivers add their bits
+        transactions (int): number of completed or failed transactions
+        errors (int): transactions that raised OSError
+        skipped (int): reads answered from the last result
+        total_us (int): time spent in transactions in microseconds
+        max_us (int): longest transaction in microseconds
+    """
+
+    def __init__(self, bus, name, min_interval_ms=0):
+        self.bus = bus
+        self.name = name
+        self.min_interval_ms = min_interval_ms
+        self.clear_on_read = {}
+        self.transactions = 0
+        self.errors = 0
+        self.skipped = 0
+        self.total_us = 0
+        self.max_us = 0
+        self._results = {}  # (address, register, length): (ticks_ms, data)
+
+    def _run(self, function, *args):
+        """Run one transaction under the bus lock and account its time."""
+        with self.bus.lock:
+            start = utime.ticks_us()
+            try:
+                return function(*args)
+            except OSError:
+                self.errors += 1
+                raise
+            finally:
+                elapsed = utime.ticks_diff(utime.ticks_us(), start)
+                self.transactions += 1
+                self.total_us += elapsed
+                if elapsed > self.max_us:
+                    self.max_us = elapsed
+
+    def _recent(self, key):
+        """Return the kept result for key if it is younger than the interval."""
+        if not self.min_interval_ms:
+            return None
+        result = self._results.get(key)
+        if result is None:
+            return None
+        if utime.ticks_diff(utime.ticks_ms(), result[0]) >= self.min_interval_ms:
+            return None
+        self.skipped += 1
+        return result[1]
+
+    def _keep(self, key, data):
+        if not self.min_interval_ms:
+            return
+        data = bytearray(data)
+        mask = self.clear_on_read.get(key[1])
+        if mask and data:
+            # the device has cleared these bits, a replay must not repeat them
+            data[0] &= ~mask
+        self._results[key] = (utime.ticks_ms(), bytes(data))
+
+    def writeto(self, address, buffer):
+        self._results.clear()
+        return self._run(self.bus.i2c.writeto, address, buffer)
+
+    def readfrom(self, address, length):
+        key = (address, None, length)
+        data = self._recent(key)
+        if data is None:
+            data = self._run(self.bus.i2c.readfrom, address, length)
+            self._keep(key, data)
+        return data
+
+    def readfrom_into(self, address, buffer):
+        key = (address, None, len(buffer))
+        data = self._recent(key)
+        if data is None:
+            self._run(self.bus.i2c.readfrom_into, address, buffer)
+            self._keep(key, buffer)
+        else:
+            buffer[:] = data
+
+    def writeto_mem(self, address, register, buffer):
+        self._results.clear()
+        return self._run(self.bus.i2c.writeto_mem, address, register, buffer)
+
+    def readfrom_mem(self, address, register, length):
+        key = (address, register, length)
+        data = self._recent(key)
+        if data is None:
+            data = self._run(self.bus.i2c.readfrom_mem, address, register, length)
+            self._keep(key, data)
+        return data
+
+    def readfrom_mem_into(self, address, register, buffer):
+        key = (address, register, len(buffer))
+        data = self._recent(key)
+        if data is None:
+            self._run(self.bus.i2c.readfrom_mem_into, address, register, buffer)
+            self._keep(key, buffer)
+        else:
+            buffer[:] = data
+
+    def stats(self):
+        """
+        Return the counters of the device.
+
+        Returns:
+            dict: transactions, errors, skipped, total_us, max_us and avg_us
+        """
+        return {
+            "transactions": self.transactions,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "total_us": self.total_us,
+            "max_us": self.max_us,
+            "avg_us": self.total_us // self.transactions if self.transactions else 0,
+        }
+
+    def reset_stats(self):
+        self.transactions = 0
+        self.errors = 0
+        self.skipped = 0
+        self.total_us = 0
+        self.max_us = 0
+
+
+class I2CBus:
+    """
+    I2C bus shared by several device drivers
+
+    Args:
+        scl (Pin): clock pin **Required**
+        sda (Pin): data pin **Required**
+        freq (int): clock speed in Hz
+        id (int): hardware I2C controller
+        i2c (I2C): already opened bus, scl, sda, freq and id are ignored
+
+    Attributes:
+        i2c (I2C): the underlying bus
+        hardware (bool): True if the hardware controller is used
+    """
+
+    def __init__(self, scl=None, sda=None, freq=400000, id=0, i2c=None):
+        if i2c is not None:
+            self.i2c = i2c
+            self.hardware = not isinstance(i2c, SoftI2C)
+        else:
+            try:
+                self.i2c = I2C(id, scl=scl, sda=sda, freq=freq)
+                self.hardware = True
+            except (ValueError, OSError):
+                # no free hardware controller, bit-bang the bus
+                self.i2c = SoftI2C(scl=scl, sda=sda, freq=freq)
+                self.hardware = False
+        self.lock = _thread.allocate_lock() if _thread is not None else _NoLock()
+        self.devices = {}
+
+    def device(self, name, min_interval_ms=None):
+        """
+        Return the I2CDevice for name, it is created on first use.
+
+        Args:
+            name (str): device name used in the statistics
+            min_interval_ms (int): minimum time between two reads of the same
+                data, None keeps the interval of an existing device (0 for a
+                new one)
+
+        Returns:
+            I2CDevice: bus proxy for a driver
+        """
+        device = self.devices.get(name)
+        if device is None:
+            device = I2CDevice(self, name, min_interval_ms or 0)
+            self.devices[name] = device
+        elif min_interval_ms is not None:
+            device.min_interval_ms = min_interval_ms
+        return device
+
+    def scan(self):
+        with self.lock:
+            return self.i2c.scan()
+
+    def report(self):
+        """
+        Return the statistics of all devices as text, one line per device.
+        """
+        lines = []
+        for name, device in sorted(self.devices.items()):
+            stats = device.stats()
+            lines.append(
+                "{}: {} transactions, {} errors, {} skipped, {} us total, {} us avg, {} us max".format(
+                    name,
+                    stats["transactions"],
+                    stats["errors"],
+                    stats["skipped"],
+                    stats["total_us"],
+                    stats["avg_us"],
+                    stats["max_us"],
+                )
+            )
+        return "\n".join(lines)
@@ -0,0 +1,215 @@
+"""
+Pump control with pump-aware soil sampling.
+
+While the pump is off the soil moisture changes slowly and the sampler runs
+at a low rate. When the pump is switched on the sampler is switched to a
+high rate, so the upper threshold is seen soon after the water arrives, and
+back to the low rate when the pump is switched off.
+
+When the pump is switched off because a reading crossed the upper
+threshold, the reaction is recorded. The latency runs from the completion
+of the sampling period that crossed the threshold to the pin going low. The
+overshoot is the distance in ADC counts between the reading and the
+threshold.
+
+Several pumps may share one sampler. The sampler then runs fast as long as
+any pump of the group is running.
+
+A Zone is one soil channel with its pump, thresholds and manual override.
+A controller handles as many zones as it has ADC channels and pump pins.
+
+Example:
+
+    sampler = SoilSampler((ADC(Pin(10)), ADC(Pin(11))))
+    pumps = PumpController.create_group((Pin(8, Pin.OUT), Pin(9, Pin.OUT)), sampler)
+    zones = [Zone(channel, pump) for channel, pump in enumerate(pumps)]
+    sampler.start()
+    while True:
+        values = sampler.read()
+        if values is not None:
+            for zone in zones:
+                zone.update(values[zone.channel])
+
+"""
+
+import utime
+
+
+class PumpController:
+    """
+    Pump output with adaptive sampling rate and reaction statistics
+
+    Args:
+        pin (Pin): output pin of the pump **Required**
+        sampler (SoilSampler): sampler whose rate follows the pump
+        idle_hz (int): sampling rate while the pump is off
+        active_hz (int): sampling rate while the pump is running
+        group (list): pumps sharing the sampler, this pump is added
+
+    Attributes:
+        running (bool): True while the pump is on
+        reactions (int): switch offs at the threshold
+        last_latency_ms (int): latency of the last switch off at the threshold
+        max_latency_ms (int): highest latency
+        last_overshoot (int): overshoot in ADC counts of the last switch off
+        max_overshoot (int): highest overshoot in ADC counts
+    """
+
+    def __init__(self, pin, sampler=None, idle_hz=16, active_hz=128, group=None):
+        self.pin = pin
+        self.sampler = sampler
+        self.idle_hz = idle_hz
+        self.active_hz = active_hz
+        self.group = group if group is not None else []
+        self.group.append(self)
+        self.running = False
+        self.reactions = 0
+        self.last_latency_ms = None
+        self.max_latency_ms = 0
+        self.last_overshoot = None
+        self.max_overshoot = 0
+        pin.value(0)
+        self._adjust_rate()
+
+    @classmethod
+    def create_group(cls, pins, sampler=None, idle_hz=16, active_hz=128):
+        """
+        Create one pump per pin, all sharing the sampler.
+
+        Returns:
+            list: PumpController per pin
+        """
+        group = []
+        for pin in pins:
+            cls(pin, sampler, idle_hz, active_hz, group)
+        return group
+
+    def _adjust_rate(self):
+        """Sample fast while any pump of the group is running."""
+        if self.sampler is None:
+            return
+        for pump in self.group:
+            if pump.running:
+                self.sampler.set_rate(self.active_hz)
+                return
+        self.sampler.set_rate(self.idle_hz)
+
+    def on(self):
+        """Switch the pump on and sample fast."""
+        if self.running:
+            return
+        self.pin.value(1)
+        self.running = True
+        self._adjust_rate()
+
+    def off(self):
+        """Switch the pump off, sample slowly if no other pump is running."""
+        if not self.running:
+            return
+        self.pin.value(0)
+        self.running = False
+        self._adjust_rate()
+
+    def off_at_threshold(self, raw, threshold):
+        """
+        Switch the pump off because a reading crossed the upper threshold
+        and record the reaction. Does nothing if the pump is not running.
+
+        Args:
+            raw (int): filtered raw ADC value that crossed the threshold
+            threshold (int): upper threshold in raw ADC counts, wetter soil
+                gives lower counts
+        """
+        if not self.running:
+            return
+        self.off()
+        if self.sampler is None or self.sampler.completed is None:
+            return
+
+        latency = utime.ticks_diff(utime.ticks_ms(), self.sampler.completed)
+        overshoot = threshold - raw
+        self.reactions += 1
+        self.last_latency_ms = latency
+        self.last_overshoot = overshoot
+        if latency > self.max_latency_ms:
+            self.max_latency_ms = latency
+        if overshoot > self.max_overshoot:
+            self.max_overshoot = overshoot
+
+    def stats(self):
+        """
+        Return the reaction statistics.
+
+        Returns:
+            dict: reactions, last and max latency in ms and overshoot in ADC
+            counts
+        """
+        return {
+            "reactions": self.reactions,
+            "last_latency_ms": self.last_latency_ms,
+            "max_latency_ms": self.max_latency_ms,
+            "last_overshoot": self.last_overshoot,
+            "max_overshoot": self.max_overshoot,
+        }
+
+
+class Zone:
+    """
+    Soil channel with its pump, thresholds and state
+
+    Thresholds are raw ADC counts, wetter soil gives lower counts. Until both
+    thresholds are set the zone is not controlled automatically: the pump
+    stays off unless it is switched on manually, and no reactions are
+    recorded. Only a pump switched on by the lower threshold records a
+    reaction at the upper threshold; a pump left on by manual mode is
+    switched off without one.
+
+    Args:
+        channel (int): index of the soil channel in the sampler **Required**
+        pump (PumpController): pump of the zone **Required**
+
+    Attributes:
+        upper_raw (int): the pump is switched off at this count or below,
+            None while not set
+        lower_raw (int): the pump is switched on above this count, None
+            while not set
+        manual (bool): True keeps the pump on regardless of the thresholds
+        automatic (bool): True while the pump runs because of the lower
+            threshold
+        raw (int): last raw soil value, None before the first update()
+    """
+
+    def __init__(self, channel, pump):
+        self.channel = channel
+        self.pump = pump
+        self.upper_raw = None
+        self.lower_raw = None
+        self.manual = False
+        self.automatic = False
+        self.raw = None
+
+    def update(self, raw=None):
+        """
+        Store a new soil value and switch the pump.
+
+        Args:
+            raw (int): filtered raw ADC value, None runs the pump logic with
+                the last value
+        """
+        if raw is not None:
+            self.raw = raw
+
+        if self.manual:
+            self.automatic = False
+            self.pump.on()
+        elif self.upper_raw is None or self.lower_raw is None or self.raw is None:
+            self.automatic = False
+            self.pump.off()  # no automatic control, not a reaction
+        elif self.raw > self.lower_raw:
+            self.automatic = True
+            self.pump.on()
+        elif not self.automatic:
+            self.pump.off()  # left on by manual mode, not a reaction
+        elif self.raw <= self.upper_raw:
+            self.automatic = False
+            self.pump.off_at_threshold(self.raw, self.upper_raw)
@@ -0,0 +1,111 @@
+"""
+Lazily loaded bitmap fonts for the ST7789 driver.
+
+A packed font file holds only the glyphs that are needed. On loading just
+the header, the sorted code point table and the per-glyph offsets are read,
+glyph bitmaps are read from flash on demand with seek() and readinto() into
+a reusable buffer. Packed fonts are created with Werkzeuge/font_pack.py and
+can be used everywhere the 8 and 16 bit wide bitmap font modules are used.
+
+File format, all values big endian:
+
+    magic       4 bytes  b"PFNT"
+    width       1 byte   glyph width in pixels, 8 or 16
+    height      1 byte   glyph height in pixels, multiple of 8
+    count       2 bytes  number of glyphs
+    code points count * 2 bytes, sorted
+    offsets     count * 4 bytes, file offset of each glyph bitmap
+    bitmaps     glyph bitmaps, width * height / 8 bytes each, one bit per
+                pixel, rows top to bottom, most significant bit left
+
+Identical glyphs may share one bitmap.
+
+Example:
+
+    font = PackedFont("vga2_16x32.fnt")
+    tft.text(font, "Temp:21 C", 10, 80)
+
+"""
+
+import struct
+from array import array
+
+MAGIC = b"PFNT"
+HEADER = ">4sBBH"
+HEADER_SIZE = 8
+
+
+class PackedFont:
+    """
+    Bitmap font read on demand from a packed font file
+
+    Args:
+        path (str): path of the packed font file **Required**
+
+    Raises:
+        ValueError: If the file is not a packed font.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        magic, self.WIDTH, self.HEIGHT, count = struct.unpack(
+            HEADER, self._file.read(HEADER_SIZE)
+        )
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError("{} is not a packed font.".format(path))
+
+        self._chars = array("H", bytes(count * 2))
+        self._offsets = array("I", bytes(count * 4))
+        table = self._file.read(count * 6)
+        for i in range(count):
+            self._chars[i] = (table[i * 2] << 8) | table[i * 2 + 1]
+            offset = count * 2 + i * 4
+            self._offsets[i] = struct.unpack(">I", table[offset : offset + 4])[0]
+
+        self.FIRST = self._chars[0] if count else 0
+        self.LAST = self._chars[count - 1] + 1 if count else 0
+        self.SIZE = self.WIDTH * self.HEIGHT // 8
+        self._buffer = bytearray(self.SIZE)
+
+    def _find(self, ch):
+        """Index of character code ch in the code point table or -1."""
+        chars = self._chars
+        low = 0
+        high = len(chars) - 1
+        while low <= high:
+            middle = (low + high) >> 1
+            value = chars[middle]
+            if value < ch:
+                low = middle + 1
+            elif value > ch:
+                high = middle - 1
+            else:
+                return middle
+        return -1
+
+    def __contains__(self, ch):
+        return self._find(ch) >= 0
+
+    def glyph(self, ch):
+        """
+        Read the bitmap of a character.
+
+        The returned buffer is reused by the next call.
+
+        Args:
+            ch (int): character code
+
+        Returns:
+            bytearray: glyph bitmap or None if the font has no such character
+        """
+        index = self._find(ch)
+        if index < 0:
+            return None
+        self._file.seek(self._offsets[index])
+        self._file.readinto(self._buffer)
+        return self._buffer
+
+    def close(self):
+        """Close the font file."""
+        self._file.close()
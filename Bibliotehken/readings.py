@@ -0,0 +1,30 @@
+"""
+Shared store of the latest sensor readings.
+
+The sensor tasks put their values into a Readings object, the display and
+MQTT tasks read them from there instead of asking the sensors again.
+
+Example:
+
+    readings = Readings()
+    readings.set("co2", ens160.get_eco2())
+    print(readings.get("co2"))
+
+"""
+
+
+class Readings:
+    """
+    Latest value of each reading
+    """
+
+    def __init__(self):
+        self._values = {}
+
+    def set(self, name, value):
+        """Store the newest value of a reading."""
+        self._values[name] = value
+
+    def get(self, name, default=None):
+        """Return the newest value of a reading or default."""
+        return self._values.get(name, default)
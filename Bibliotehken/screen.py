@@ -0,0 +1,147 @@
+"""
+Retained-mode text screen for the ST7789 driver.
+
+The screen remembers which character is drawn in every glyph cell of every
+registered text field. Updating a field only redraws the cells whose
+character actually changed, a full repaint only happens when the background
+colour changes.
+
+Example:
+
+    screen = Screen(tft, font)
+    screen.add_field("temp", 10, 80, 14)
+    screen.background(st7789.GREEN)
+    screen.set_text("temp", "Temp:21 C")
+
+"""
+
+import st7789py as st7789
+
+
+class Screen:
+    """
+    Retained-mode screen model
+
+    Args:
+        tft (ST7789): display driver **Required**
+        font (module): 8 or 16 bit wide bitmap font **Required**
+        foreground (int): default 565 encoded text color
+        height (int): number of display rows cleared by a repaint, defaults
+            to the whole display. Rows below are left alone, for example for
+            a TrendStrip.
+    """
+
+    def __init__(self, tft, font, foreground=st7789.BLACK, height=None):
+        self.tft = tft
+        self.font = font
+        self.foreground = foreground
+        self.height = height
+        self._background = None
+        self._fields = {}
+        self._order = []
+
+    def add_field(self, name, x, y, length, color=None):
+        """
+        Register a text field with a fixed number of glyph cells.
+
+        Args:
+            name (str): name of the field
+            x (int): column of the first cell
+            y (int): row of the first cell
+            length (int): number of glyph cells of the field
+            color (int): 565 encoded text color, defaults to foreground
+        """
+        if name not in self._fields:
+            self._order.append(name)
+        # [x, y, drawn cells, text color]
+        self._fields[name] = [x, y, [None] * length, color]
+
+    def background(self, color):
+        """
+        Set the background color, repaints the whole screen only if the
+        color changed.
+
+        Args:
+            color (int): 565 encoded background color
+
+        Returns:
+            bool: True if the screen was repainted
+        """
+        if color == self._background:
+            return False
+        self._background = color
+        self.repaint()
+        return True
+
+    def repaint(self):
+        """
+        Clear the screen and redraw every field from the retained state.
+        """
+        if self.height is None:
+            self.tft.fill(self._background)
+        else:
+            self.tft.fill_rect(0, 0, self.tft.width, self.height, self._background)
+        for name in self._order:
+            cells = self._fields[name][2]
+            text = "".join(cell or " " for cell in cells)
+            # after the fill every cell shows a space
+            for i in range(len(cells)):
+                cells[i] = " "
+            self.set_text(name, text)
+
+    def set_text(self, name, text, color=None):
+        """
+        Show text in a field, only the changed glyph cells are redrawn.
+        Text longer than the field is truncated, shorter text is padded
+        with spaces.
+
+        Args:
+            name (str): name of the field
+            text (str): text to show
+            color (int): 565 encoded text color, optional
+
+        Returns:
+            int: number of redrawn glyph cells
+        """
+        field = self._fields[name]
+        cells = field[2]
+        length = len(cells)
+        if color is not None and color != field[3]:
+            field[3] = color
+            for i in range(length):
+                cells[i] = None
+
+        if len(text) < length:
+            text += " " * (length - len(text))
+
+        if self._background is None:
+            # nothing is drawn before the first background() call, the
+            # text is kept and drawn by the repaint
+            for i in range(length):
+                cells[i] = text[i]
+            return 0
+
+        fg = self.foreground if field[3] is None else field[3]
+        width = self.font.WIDTH
+        redrawn = 0
+        start = -1
+        for i in range(length + 1):
+            changed = i < length and cells[i] != text[i]
+            if changed:
+                cells[i] = text[i]
+                if start < 0:
+                    start = i
+            elif start >= 0:
+                # draw the run of changed cells in one call
+                self.tft.text(
+                    self.font,
+                    text[start:i],
+                    field[0] + start * width,
+                    field[1],
+                    fg,
+                    self._background,
+                )
+                redrawn += i - start
+                start = -1
+
+        return redrawn
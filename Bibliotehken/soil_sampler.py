@@ -0,0 +1,165 @@
+"""
+Oversampled soil moisture acquisition.
+
+A hardware timer reads one or more ADC channels at a fixed rate into a
+preallocated ring buffer. All channels are scanned in one pass of the timer
+callback, which neither allocates nor filters. Once per period, when the
+ring is full, read() takes the ring over and hands the next samples to a
+second buffer of the same size. The taken samples are filtered per channel:
+every group of window samples is reduced to its median, which removes
+single spikes, and the medians are averaged (decimation) into one raw ADC
+value per channel.
+
+Example:
+
+    sampler = SoilSampler((soil_1, soil_2), rate_hz=64, samples=32, window=4)
+    sampler.start()
+    while True:
+        values = sampler.read()    # None until a new period is complete
+        if values is not None:
+            print(values[0], values[1])
+
+"""
+
+from array import array
+
+import micropython
+import utime
+from machine import Timer, disable_irq, enable_irq
+
+
+class SoilSampler:
+    """
+    ADC sampler with median and decimation filter
+
+    Args:
+        adc (ADC or tuple): configured ADC of the sensor, or a tuple of ADCs
+            scanned together **Required**
+        timer_id (int): hardware timer used for sampling
+        rate_hz (int): samples per second
+        samples (int): samples per filtered value, the period is
+            samples / rate_hz seconds
+        window (int): samples per median group, samples must be a multiple
+
+    Attributes:
+        values (array): last filtered raw ADC value per channel, reused by
+            every read()
+        value (int): last filtered raw ADC value of the first channel, None
+            before the first period is complete
+        completed (int): ticks_ms when the last period was complete
+
+    Raises:
+        ValueError: If samples is not a multiple of window.
+    """
+
+    def __init__(self, adc, timer_id=0, rate_hz=64, samples=32, window=4):
+        if window < 1 or samples % window:
+            raise ValueError("samples must be a multiple of window.")
+
+        self.adcs = tuple(adc) if isinstance(adc, (tuple, list)) else (adc,)
+        self.channels = len(self.adcs)
+        self.rate_hz = rate_hz
+        self.window = window
+        self.value = None
+        self.values = array("H", bytes(self.channels * 2))
+        self.completed = None
+        # one row of channels per sample
+        self._ring = array("H", bytes(samples * self.channels * 2))
+        self._spare = array("H", bytes(samples * self.channels * 2))
+        self._group = array("H", bytes(window * 2))
+        self._size = samples
+        self._index = 0
+        self._count = 0
+        self._running = False
+        self._timer = Timer(timer_id)
+        self._callback = self._sample  # bound once, not on every start()
+
+    def start(self):
+        """Start sampling, a new period begins."""
+        self._index = 0
+        self._count = 0
+        self._running = True
+        self._timer.init(freq=self.rate_hz, mode=Timer.PERIODIC, callback=self._callback)
+
+    def set_rate(self, rate_hz):
+        """
+        Change the sampling rate. If sampling is running, the current
+        period is discarded.
+
+        Args:
+            rate_hz (int): samples per second
+        """
+        if rate_hz == self.rate_hz:
+            return
+        self.rate_hz = rate_hz
+        if self._running:
+            self._timer.deinit()
+            self.start()
+
+    def stop(self):
+        """Stop sampling."""
+        self._running = False
+        self._timer.deinit()
+
+    def _sample(self, timer):
+        """Timer callback, stores one reading per channel in the ring buffer."""
+        index = self._index
+        ring = self._ring
+        position = index * self.channels
+        for adc in self.adcs:
+            ring[position] = adc.read()
+            position += 1
+        index += 1
+        self._index = 0 if index == self._size else index
+        if self._count < self._size:
+            self._count += 1
+            if self._count == self._size:
+                self.completed = utime.ticks_ms()
+
+    def read(self):
+        """
+        Return the filtered values once per period.
+
+        Returns:
+            array: filtered raw ADC value per channel (the values
+            attribute), None if the current period is not complete yet
+        """
+        if self._count < self._size:
+            return None
+
+        # swap the buffers, the timer continues with an empty period
+        state = disable_irq()
+        samples = self._ring
+        self._ring = self._spare
+        self._index = 0
+        self._count = 0
+        enable_irq(state)
+        self._spare = samples
+
+        for channel in range(self.channels):
+            self.values[channel] = self._filter(samples, channel)
+        self.value = self.values[0]
+        return self.values
+
+    @micropython.native
+    def _filter(self, samples, channel):
+        """Average of the medians of each group of window samples."""
+        group = self._group
+        window = self.window
+        channels = self.channels
+        total = 0
+        for start in range(0, self._size, window):
+            # insertion sort of one group
+            for i in range(window):
+                value = samples[(start + i) * channels + channel]
+                j = i
+                while j > 0 and group[j - 1] > value:
+                    group[j] = group[j - 1]
+                    j -= 1
+                group[j] = value
+            middle = window >> 1
+            if window & 1:
+                total += group[middle]
+            else:
+                total += (group[middle - 1] + group[middle]) >> 1
+        return total // (self._size // window)
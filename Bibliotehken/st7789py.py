@@ -53,15 +53,21 @@ This driver supports:
 from math import sin, cos
 
 #
-# This allows sphinx to build the docs
+# This allows sphinx to build the docs and the driver to run on CPython,
+# for example against the simulator in Werkzeuge/st7789_sim.py
 #
 
+_VIPER = True
+
 try:
     from time import sleep_ms
 except ImportError:
+    _VIPER = False
     sleep_ms = lambda ms: None
     uint = int
     const = lambda x: x
+    ptr8 = lambda buffer: buffer
+    ptr16 = lambda buffer: memoryview(buffer).cast("H")
 
     class micropython:
         @staticmethod
@@ -110,6 +116,10 @@ _ST7789_MADCTL_RGB = const(0x00)
 RGB = 0x00
 BGR = 0x08
 
+# Interface pixel formats (COLMOD values)
+COLOR_565 = 0x55
+COLOR_444 = 0x53
+
 # Color modes
 _COLOR_MODE_65K = const(0x50)
 _COLOR_MODE_262K = const(0x60)
@@ -133,9 +143,15 @@ _ENCODE_PIXEL_SWAPPED = const("<H")
 _ENCODE_POS = const(">HH")
 _ENCODE_POS_16 = const("<HH")
 
-# must be at least 128 for 8 bit wide fonts
-# must be at least 256 for 16 bit wide fonts
-_BUFFER_SIZE = const(256)
+# default number of pixels in the fill buffer, fill_rect() sends one
+# write per buffer full
+_BUFFER_SIZE = const(2048)
+
+# default size in bytes of the buffer text lines are composed in
+_LINE_BUFFER_SIZE = const(8192)
+
+# number of string widths remembered per converted true-type font
+_WIDTH_CACHE_SIZE = const(32)
 
 _BIT7 = const(0x80)
 _BIT6 = const(0x40)
@@ -224,6 +240,146 @@ def color565(red, green=0, blue=0):
     return (red & 0xF8) << 8 | (green & 0xFC) << 3 | blue >> 3
 
 
+def color565_to_444(color):
+    """
+    Convert a 16-bit 565 encoded color into the 12-bit 444 encoding used in
+    COLOR_444 mode. The driver does this itself, all drawing methods take
+    565 encoded colors in both modes.
+    """
+    return (color >> 12) << 8 | ((color >> 7) & 0x0F) << 4 | (color >> 1) & 0x0F
+
+
+# character indexes of fonts that do not accept new attributes
+_FONT_INDEXES = {}
+
+
+def _font_index(font):
+    """
+    Return the character index of a converted true-type font.
+
+    The index maps every character of font.MAP to a (bit offset, width)
+    tuple. It is built on first use and stored on the font module together
+    with a cache of string widths, so later lookups are a dict access
+    instead of a search through font.MAP.
+
+    Args:
+        font (font): The module containing the converted true-type font
+
+    Returns:
+        tuple: (character index dict, string width dict)
+    """
+    try:
+        return font._ST7789_INDEX
+    except AttributeError:
+        pass
+
+    cached = _FONT_INDEXES.get(font)
+    if cached is not None:
+        return cached
+
+    chars = {}
+    offset_width = font.OFFSET_WIDTH
+    offsets = font.OFFSETS
+    widths = font.WIDTHS
+    for char_index, character in enumerate(font.MAP):
+        if character in chars:
+            continue
+        offset = char_index * offset_width
+        bs_bit = 0
+        for i in range(offset_width):
+            bs_bit = (bs_bit << 8) + offsets[offset + i]
+        chars[character] = (bs_bit, widths[char_index])
+
+    index = (chars, {})
+    try:
+        font._ST7789_INDEX = index
+    except (AttributeError, TypeError):
+        # frozen modules are read only
+        _FONT_INDEXES[font] = index
+    return index
+
+
+class GlyphCache:
+    """
+    Bounded LRU cache for expanded glyph bitmaps.
+
+    Entries are keyed by (font, character, foreground, background) and hold
+    the complete color565 bitmap of the glyph. When the byte budget is
+    exceeded the least recently used glyphs are evicted.
+
+    Args:
+        size (int): byte budget of the cache
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._tick = 0
+        self._entries = {}
+
+    def get(self, key):
+        """
+        Return the cached bitmap for key or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._tick += 1
+        entry[0] = self._tick
+        return entry[1]
+
+    def put(self, key, buffer):
+        """
+        Store a bitmap, evicting the least recently used ones if needed.
+        Bitmaps larger than the whole budget are not cached.
+        """
+        needed = len(buffer)
+        if needed > self.size:
+            return
+
+        entries = self._entries
+        while self.used + needed > self.size:
+            oldest = None
+            oldest_tick = self._tick + 1
+            for entry_key, entry in entries.items():
+                if entry[0] < oldest_tick:
+                    oldest = entry_key
+                    oldest_tick = entry[0]
+            self.used -= len(entries.pop(oldest)[1])
+
+        self._tick += 1
+        entries[key] = [self._tick, buffer]
+        self.used += needed
+
+    def clear(self):
+        """
+        Remove all cached bitmaps.
+        """
+        self._entries = {}
+        self.used = 0
+
+
+class _Transaction:
+    """
+    Context manager keeping the display selected, see ST7789.transaction()
+    """
+
+    def __init__(self, display):
+        self.display = display
+
+    def __enter__(self):
+        self.display.begin()
+        return self.display
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.display.end()
+
+
 class ST7789:
     """
     ST7789 driver class
@@ -256,6 +412,22 @@ class ST7789:
 
           - ((width, height, xstart, ystart, madctl, needs_swap), ...)
 
+        color_mode (int):
+
+          - COLOR_565: 16 bits per pixel, default
+          - COLOR_444: 12 bits per pixel, two pixels in three bytes. Cuts
+            the bus traffic by 25%, colors are still given as 565 and
+            converted by the driver.
+
+        glyph_cache (int): byte budget of the glyph cache used by text(),
+            0 disables the cache. A 16x32 glyph takes 1024 bytes.
+
+        line_buffer (int): size in bytes of the buffer text() composes a
+            line in. Lines that do not fit are sent in horizontal stripes.
+
+        buffer_size (int): number of pixels in the fill buffer used by
+            fill_rect() and fill().
+
     """
 
     def __init__(
@@ -271,6 +443,10 @@ class ST7789:
         color_order=BGR,
         custom_init=None,
         custom_rotations=None,
+        color_mode=COLOR_565,
+        glyph_cache=0,
+        line_buffer=_LINE_BUFFER_SIZE,
+        buffer_size=_BUFFER_SIZE,
     ):
         """
         Initialize display.
@@ -298,7 +474,35 @@ class ST7789:
         self.backlight = backlight
         self._rotation = rotation % 4
         self.color_order = color_order
+        self.color_mode = color_mode
         self.init_cmds = custom_init or _ST7789_INIT_CMDS
+        self.glyph_cache = GlyphCache(glyph_cache) if glyph_cache else None
+        # at least one full display row has to fit into the line buffer
+        self._line_buffer = bytearray(max(line_buffer, 2 * max(width, height)))
+        # preallocated scratch buffers, steady state drawing does not
+        # allocate
+        self._fill_buffer = bytearray(buffer_size * 2)
+        if color_mode == COLOR_444:
+            # whole pixel pairs of three bytes
+            self._buffer_size = len(self._fill_buffer) // 3 * 2
+            self._fill_view = memoryview(self._fill_buffer)[: self._buffer_size // 2 * 3]
+        else:
+            self._buffer_size = buffer_size
+            self._fill_view = memoryview(self._fill_buffer)
+        self._fill_color = None
+        self._pack_buffer = bytearray(0)
+        self._window_buffer = bytearray(4)
+        self._pixel_buffer = bytearray(3)
+        self._pixel_view = memoryview(self._pixel_buffer)[
+            : 3 if color_mode == COLOR_444 else 2
+        ]
+        self._scroll_buffer = bytearray(2)
+        self._palettes = {}
+        self._transaction = _Transaction(self)
+        self._selected = 0
+        self.saved_commands = 0
+        self.saved_bytes = 0
+        self._invalidate_window()
         self.hard_reset()
         # yes, twice, once is not always enough
         self.init(self.init_cmds)
@@ -319,15 +523,19 @@ class ST7789:
 
     def init(self, commands):
         """
-        Initialize display.
+        Initialize display. The colour mode of the driver is set again
+        afterwards, whatever COLMOD the commands contain.
         """
         for command, data, delay in commands:
             self._write(command, data)
             sleep_ms(delay)
+        if self.color_mode != COLOR_565:
+            self._write(_ST7789_COLMOD, bytes([self.color_mode]))
+        self._invalidate_window()
 
     def _write(self, command=None, data=None):
         """SPI write to the device: commands and data."""
-        if self.cs:
+        if self.cs and not self._selected:
             self.cs.off()
         if command is not None:
             self.dc.off()
@@ -335,9 +543,57 @@ class ST7789:
         if data is not None:
             self.dc.on()
             self.spi.write(data)
-            if self.cs:
+            if self.cs and not self._selected:
                 self.cs.on()
 
+    def transaction(self):
+        """
+        Return a context manager that keeps the display selected (CS low)
+        across all writes inside the with block. Transactions can be nested.
+
+        Example:
+
+            with tft.transaction():
+                tft.hline(0, 0, 100, st7789.RED)
+                tft.hline(0, 10, 100, st7789.RED)
+        """
+        return self._transaction
+
+    def begin(self):
+        """
+        Start a transaction, the display stays selected until the matching
+        end() call.
+        """
+        if self._selected == 0 and self.cs:
+            self.cs.off()
+        self._selected += 1
+
+    def end(self):
+        """
+        End a transaction started with begin().
+        """
+        self._selected -= 1
+        if self._selected == 0 and self.cs:
+            self.cs.on()
+
+    def reset_saved(self):
+        """
+        Reset the saved_commands and saved_bytes counters.
+
+        saved_commands counts the CASET/RASET commands that were skipped
+        because the window did not change, saved_bytes the command and
+        data bytes of these commands.
+        """
+        self.saved_commands = 0
+        self.saved_bytes = 0
+
+    def _invalidate_window(self):
+        """Forget the cached window, the next draw sends CASET and RASET."""
+        self._window_x0 = -1
+        self._window_y0 = -1
+        self._window_x1 = -1
+        self._window_y1 = -1
+
     def hard_reset(self):
         """
         Hard reset display.
@@ -355,6 +611,7 @@ class ST7789:
         sleep_ms(120)
         if self.cs:
             self.cs.on()
+        self._invalidate_window()
 
     def soft_reset(self):
         """
@@ -362,6 +619,7 @@ class ST7789:
         """
         self._write(_ST7789_SWRESET)
         sleep_ms(150)
+        self._invalidate_window()
 
     def sleep_mode(self, value):
         """
@@ -419,6 +677,8 @@ class ST7789:
             madctl &= ~_ST7789_MADCTL_BGR
 
         self._write(_ST7789_MADCTL, bytes([madctl]))
+        self._invalidate_window()
+        self._fill_color = None
 
     def _set_window(self, x0, y0, x1, y1):
         """
@@ -431,14 +691,29 @@ class ST7789:
             y1 (int): row end address
         """
         if x0 <= x1 <= self.width and y0 <= y1 <= self.height:
-            self._write(
-                _ST7789_CASET,
-                struct.pack(_ENCODE_POS, x0 + self.xstart, x1 + self.xstart),
-            )
-            self._write(
-                _ST7789_RASET,
-                struct.pack(_ENCODE_POS, y0 + self.ystart, y1 + self.ystart),
-            )
+            if (
+                x0 == self._window_x0
+                and x1 == self._window_x1
+                and y0 == self._window_y0
+                and y1 == self._window_y1
+            ):
+                # same window as before, only restart the memory write
+                self.saved_commands += 2
+                self.saved_bytes += 10
+            else:
+                buffer = self._window_buffer
+                struct.pack_into(
+                    _ENCODE_POS, buffer, 0, x0 + self.xstart, x1 + self.xstart
+                )
+                self._write(_ST7789_CASET, buffer)
+                struct.pack_into(
+                    _ENCODE_POS, buffer, 0, y0 + self.ystart, y1 + self.ystart
+                )
+                self._write(_ST7789_RASET, buffer)
+                self._window_x0 = x0
+                self._window_y0 = y0
+                self._window_x1 = x1
+                self._window_y1 = y1
             self._write(_ST7789_RAMWR)
 
     def vline(self, x, y, length, color):
@@ -474,13 +749,110 @@ class ST7789:
             Y (int): y coordinate
             color (int): 565 encoded color
         """
-        self._set_window(x, y, x, y)
-        self._write(
-            None,
-            struct.pack(
-                _ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL, color
-            ),
+        with self._transaction:
+            self._set_window(x, y, x, y)
+            self._encode(color, self._pixel_buffer)
+            self._write(None, self._pixel_view)
+
+    def _encode(self, color, buffer):
+        """
+        Encode a 565 color into the first bytes of buffer in the format sent
+        to the display. In COLOR_444 mode a pair of two pixels of the color
+        is encoded into three bytes.
+
+        Args:
+            color (int): 565 encoded color
+            buffer (bytearray): target, at least 3 bytes
+
+        Returns:
+            int: number of encoded bytes
+        """
+        if self.color_mode == COLOR_444:
+            color = color565_to_444(color)
+            buffer[0] = color >> 4
+            buffer[1] = (color & 0x0F) << 4 | color >> 8
+            buffer[2] = color & 0xFF
+            return 3
+
+        struct.pack_into(
+            _ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL,
+            buffer,
+            0,
+            color,
         )
+        return 2
+
+    @micropython.viper
+    @staticmethod
+    def _pack444_viper(src, pixels: int, dst, swapped: int):
+        """
+        Pack color565 pixels into 444 pixel pairs of three bytes. An odd
+        last pixel is paired with the first one, the display writes it over
+        the first pixel of the window again.
+        """
+        source = ptr8(src)
+        target = ptr8(dst)
+        hi = 1 if swapped else 0
+        lo = 0 if swapped else 1
+        first = (source[hi] << 8) | source[lo]
+        i = 0
+        j = 0
+        while i < pixels:
+            c0 = (source[i * 2 + hi] << 8) | source[i * 2 + lo]
+            if i + 1 < pixels:
+                c1 = (source[i * 2 + 2 + hi] << 8) | source[i * 2 + 2 + lo]
+            else:
+                c1 = first
+            target[j] = ((c0 >> 8) & 0xF0) | ((c0 >> 7) & 0x0F)
+            target[j + 1] = ((c0 << 3) & 0xF0) | (c1 >> 12)
+            target[j + 2] = ((c1 >> 3) & 0xF0) | ((c1 >> 1) & 0x0F)
+            i += 2
+            j += 3
+
+    @staticmethod
+    def _pack444_python(src, pixels, dst, swapped):
+        """
+        Pure Python version of _pack444_viper.
+        """
+        hi = 1 if swapped else 0
+        lo = 0 if swapped else 1
+        first = (src[hi] << 8) | src[lo]
+        j = 0
+        for i in range(0, pixels, 2):
+            c0 = (src[i * 2 + hi] << 8) | src[i * 2 + lo]
+            if i + 1 < pixels:
+                c1 = (src[i * 2 + 2 + hi] << 8) | src[i * 2 + 2 + lo]
+            else:
+                c1 = first
+            dst[j] = ((c0 >> 8) & 0xF0) | ((c0 >> 7) & 0x0F)
+            dst[j + 1] = ((c0 << 3) & 0xF0) | (c1 >> 12)
+            dst[j + 2] = ((c1 >> 3) & 0xF0) | ((c1 >> 1) & 0x0F)
+            j += 3
+
+    def _write_pixels(self, buffer):
+        """
+        Write color565 pixel data to the current window, packed into 444
+        pixel pairs in COLOR_444 mode.
+
+        Args:
+            buffer (buffer): color565 pixels in display byte order
+        """
+        if self.color_mode != COLOR_444:
+            self._write(None, buffer)
+            return
+
+        pixels = len(buffer) // 2
+        if not pixels:
+            return
+        size = (pixels + 1) // 2 * 3
+        if len(self._pack_buffer) < size:
+            self._pack_buffer = bytearray(size)
+        packed = memoryview(self._pack_buffer)[:size]
+        if _VIPER:
+            self._pack444_viper(buffer, pixels, packed, self.needs_swap)
+        else:
+            self._pack444_python(buffer, pixels, packed, self.needs_swap)
+        self._write(None, packed)
 
     def blit_buffer(self, buffer, x, y, width, height):
         """
@@ -493,8 +865,9 @@ class ST7789:
             width (int): Width
             height (int): Height
         """
-        self._set_window(x, y, x + width - 1, y + height - 1)
-        self._write(None, buffer)
+        with self._transaction:
+            self._set_window(x, y, x + width - 1, y + height - 1)
+            self._write_pixels(buffer)
 
     def rect(self, x, y, w, h, color):
         """
@@ -507,10 +880,11 @@ class ST7789:
             height (int): Height in pixels
             color (int): 565 encoded color
         """
-        self.hline(x, y, w, color)
-        self.vline(x, y, h, color)
-        self.vline(x + w - 1, y, h, color)
-        self.hline(x, y + h - 1, w, color)
+        with self._transaction:
+            self.hline(x, y, w, color)
+            self.vline(x, y, h, color)
+            self.vline(x + w - 1, y, h, color)
+            self.hline(x, y + h - 1, w, color)
 
     def fill_rect(self, x, y, width, height, color):
         """
@@ -523,18 +897,57 @@ class ST7789:
             height (int): Height in pixels
             color (int): 565 encoded color
         """
-        self._set_window(x, y, x + width - 1, y + height - 1)
-        chunks, rest = divmod(width * height, _BUFFER_SIZE)
-        pixel = struct.pack(
-            _ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL, color
-        )
-        self.dc.on()
-        if chunks:
-            data = pixel * _BUFFER_SIZE
-            for _ in range(chunks):
-                self._write(None, data)
-        if rest:
-            self._write(None, pixel * rest)
+        with self._transaction:
+            self._set_window(x, y, x + width - 1, y + height - 1)
+            chunks, rest = divmod(width * height, self._buffer_size)
+            self._fill_pattern(color)
+            self.dc.on()
+            if chunks:
+                data = self._fill_view
+                for _ in range(chunks):
+                    self._write(None, data)
+            if rest:
+                if self.color_mode == COLOR_444:
+                    # an odd last pixel is written over the first one again
+                    rest = (rest + 1) // 2 * 3
+                else:
+                    rest *= 2
+                self._write(None, self._fill_view[:rest])
+
+    def _fill_pattern(self, color):
+        """
+        Fill the fill buffer with color, only if it holds another color.
+
+        Args:
+            color (int): 565 encoded color
+        """
+        if color == self._fill_color:
+            return
+
+        filled = self._encode(color, self._fill_buffer)
+        # double the filled part until the buffer is full
+        view = self._fill_view
+        size = len(view)
+        while filled < size:
+            count = min(filled, size - filled)
+            view[filled : filled + count] = view[:count]
+            filled += count
+        self._fill_color = color
+
+    def _scratch(self, size):
+        """
+        Return a scratch buffer of at least size bytes. The line buffer is
+        grown if needed and kept for later calls.
+
+        Args:
+            size (int): needed size in bytes
+
+        Returns:
+            memoryview: view of exactly size bytes
+        """
+        if len(self._line_buffer) < size:
+            self._line_buffer = bytearray(size)
+        return memoryview(self._line_buffer)[:size]
 
     def fill(self, color):
         """
@@ -567,16 +980,21 @@ class ST7789:
         dy = abs(y1 - y0)
         err = dx // 2
         ystep = 1 if y0 < y1 else -1
-        while x0 <= x1:
-            if steep:
-                self.pixel(y0, x0, color)
-            else:
-                self.pixel(x0, y0, color)
-            err -= dy
-            if err < 0:
-                y0 += ystep
-                err += dx
-            x0 += 1
+        # pixels on the same row (column if steep) are drawn as one span
+        start = x0
+        with self._transaction:
+            while x0 <= x1:
+                err -= dy
+                if err < 0 or x0 == x1:
+                    if steep:
+                        self.vline(y0, start, x0 - start + 1, color)
+                    else:
+                        self.hline(start, y0, x0 - start + 1, color)
+                    start = x0 + 1
+                    if err < 0:
+                        y0 += ystep
+                        err += dx
+                x0 += 1
 
     def vscrdef(self, tfa, vsa, bfa):
         """
@@ -612,7 +1030,8 @@ class ST7789:
             vssa (int): Vertical Scrolling Start Address
 
         """
-        self._write(_ST7789_VSCSAD, struct.pack(">H", vssa))
+        struct.pack_into(">H", self._scroll_buffer, 0, vssa)
+        self._write(_ST7789_VSCSAD, self._scroll_buffer)
 
     @micropython.viper
     @staticmethod
@@ -678,102 +1097,227 @@ class ST7789:
 
         return buffer
 
-    def _text8(self, font, text, x0, y0, fg_color=WHITE, bg_color=BLACK):
+    @micropython.viper
+    @staticmethod
+    def _copy_rows(
+        dst, dst_idx: int, dst_stride: int, src, src_idx: int, length: int, rows: int
+    ):
+        """
+        Copy rows of length bytes from a packed source into a strided buffer.
         """
-        Internal method to write characters with width of 8 and
-        heights of 8 or 16.
+        target = ptr8(dst)
+        source = ptr8(src)
+        for _ in range(rows):
+            for i in range(length):
+                target[dst_idx + i] = source[src_idx + i]
+            dst_idx += dst_stride
+            src_idx += length
+
+    def _glyph(self, font, ch, fg_color, bg_color):
+        """
+        Internal method to get the color565 bitmap of a character, from the
+        glyph cache if possible.
 
         Args:
-            font (module): font module to use
+            font (module): font module or PackedFont to use
+            ch (int): character code
+            fg_color (int): byte swapped 565 color to use for the character
+            bg_color (int): byte swapped 565 color to use for the background
+
+        Returns:
+            bytearray: font.WIDTH * font.HEIGHT pixel bitmap
+        """
+        cache = self.glyph_cache
+        if cache is not None:
+            key = (font, ch, fg_color, bg_color)
+            buffer = cache.get(key)
+            if buffer is not None:
+                return buffer
+
+        # each pass expands 8 rows of the glyph
+        if font.WIDTH == 8:
+            pack = self._pack8
+            size = 8 * font.HEIGHT // 8
+            each = 8
+        else:
+            pack = self._pack16
+            size = 16 * font.HEIGHT // 8
+            each = 16
+
+        if hasattr(font, "glyph"):
+            # packed fonts read the glyph from flash on demand
+            glyphs = font.glyph(ch)
+            first = 0
+        else:
+            glyphs = font.FONT
+            first = (ch - font.FIRST) * size
+
+        passes = font.HEIGHT // 8
+        pass_len = font.WIDTH * 16
+        buffer = bytearray(pass_len * passes)
+        for line in range(passes):
+            idx = first + each * line
+            buffer[line * pass_len : (line + 1) * pass_len] = pack(
+                glyphs, idx, fg_color, bg_color
+            )
+
+        if cache is not None:
+            cache.put(key, buffer)
+        return buffer
+
+    def text(self, font, text, x0, y0, color=WHITE, background=BLACK):
+        """
+        Draw text on display in specified font and colors. 8 and 16 bit wide
+        fonts are supported, as font modules or as PackedFont.
+
+        Args:
+            font (module): font module or PackedFont to use.
             text (str): text to write
             x0 (int): column to start drawing at
             y0 (int): row to start drawing at
             color (int): 565 encoded color to use for characters
             background (int): 565 encoded color to use for background
         """
+        fg_color = color if self.needs_swap else ((color << 8) & 0xFF00) | (color >> 8)
+        bg_color = (
+            background
+            if self.needs_swap
+            else ((background << 8) & 0xFF00) | (background >> 8)
+        )
+
+        if y0 + font.HEIGHT > self.height:
+            return
 
+        # split the text into runs of drawable characters, each run is
+        # composed into the line buffer and sent as one block
+        width = font.WIDTH
+        packed = hasattr(font, "glyph")
+        run = []
         for char in text:
+            if x0 + width * (len(run) + 1) > self.width:
+                break
             ch = ord(char)
-            if (
-                font.FIRST <= ch < font.LAST
-                and x0 + font.WIDTH <= self.width
-                and y0 + font.HEIGHT <= self.height
-            ):
-                if font.HEIGHT == 8:
-                    passes = 1
-                    size = 8
-                    each = 0
-                else:
-                    passes = 2
-                    size = 16
-                    each = 8
-
-                for line in range(passes):
-                    idx = (ch - font.FIRST) * size + (each * line)
-                    buffer = self._pack8(font.FONT, idx, fg_color, bg_color)
-                    self.blit_buffer(buffer, x0, y0 + 8 * line, 8, 8)
+            if font.FIRST <= ch < font.LAST and (not packed or ch in font):
+                run.append(ch)
+            else:
+                self._text_run(font, run, x0, y0, fg_color, bg_color)
+                x0 += width * (len(run) + 1)
+                run = []
 
-                x0 += 8
+        self._text_run(font, run, x0, y0, fg_color, bg_color)
 
-    def _text16(self, font, text, x0, y0, fg_color=WHITE, bg_color=BLACK):
+    def _text_run(self, font, chars, x0, y0, fg_color, bg_color):
         """
-        Internal method to draw characters with width of 16 and heights of 16
-        or 32.
+        Internal method to draw a run of characters using a single window
+        and a single SPI write per stripe of the line buffer.
 
         Args:
             font (module): font module to use
-            text (str): text to write
+            chars (list): character codes to draw
             x0 (int): column to start drawing at
             y0 (int): row to start drawing at
-            color (int): 565 encoded color to use for characters
-            background (int): 565 encoded color to use for background
+            fg_color (int): byte swapped 565 color to use for characters
+            bg_color (int): byte swapped 565 color to use for background
         """
+        if not chars:
+            return
 
-        for char in text:
-            ch = ord(char)
-            if (
-                font.FIRST <= ch < font.LAST
-                and x0 + font.WIDTH <= self.width
-                and y0 + font.HEIGHT <= self.height
-            ):
-                each = 16
-                if font.HEIGHT == 16:
-                    passes = 2
-                    size = 32
-                else:
-                    passes = 4
-                    size = 64
+        height = font.HEIGHT
+        glyph_row = font.WIDTH * 2
+        line_row = glyph_row * len(chars)
+        rows = min(height, len(self._line_buffer) // line_row)
+        glyphs = [self._glyph(font, ch, fg_color, bg_color) for ch in chars]
+        buffer = memoryview(self._line_buffer)
+        x1 = x0 + font.WIDTH * len(chars) - 1
+
+        with self._transaction:
+            for row in range(0, height, rows):
+                stripe = min(rows, height - row)
+                dst = 0
+                for glyph in glyphs:
+                    self._copy_rows(
+                        buffer, dst, line_row, glyph, row * glyph_row, glyph_row, stripe
+                    )
+                    dst += glyph_row
+
+                self._set_window(x0, y0 + row, x1, y0 + row + stripe - 1)
+                self._write_pixels(buffer[: line_row * stripe])
 
-                for line in range(passes):
-                    idx = (ch - font.FIRST) * size + (each * line)
-                    buffer = self._pack16(font.FONT, idx, fg_color, bg_color)
-                    self.blit_buffer(buffer, x0, y0 + 8 * line, 16, 8)
-            x0 += 16
+    @micropython.viper
+    @staticmethod
+    def _decode_viper(src, bs_bit: int, bpp: int, count: int, lut, dst):
+        """
+        Decode count palette indices of 1, 2, 4 or 8 bits starting at bit
+        bs_bit of src into color565 pixels using the palette lookup table.
+        """
+        source = ptr8(src)
+        palette = ptr8(lut)
+        target = ptr8(dst)
+        mask = (1 << bpp) - 1
+        top = 8 - bpp
+        end = count * 2
+        i = 0
+        while i < end:
+            color_index = (
+                (source[bs_bit >> 3] >> (top - (bs_bit & 7))) & mask
+            ) << 1
+            target[i] = palette[color_index]
+            target[i + 1] = palette[color_index + 1]
+            bs_bit += bpp
+            i += 2
 
-    def text(self, font, text, x0, y0, color=WHITE, background=BLACK):
+    @staticmethod
+    def _decode_python(src, bs_bit, bpp, count, lut, dst):
         """
-        Draw text on display in specified font and colors. 8 and 16 bit wide
-        fonts are supported.
+        Decode count palette indices of any bit depth starting at bit bs_bit
+        of src into color565 pixels using the palette lookup table.
+        """
+        for i in range(0, count * 2, 2):
+            color_index = 0
+            for _ in range(bpp):
+                color_index = (color_index << 1) | (
+                    (src[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1
+                )
+                bs_bit += 1
+
+            color_index <<= 1
+            dst[i] = lut[color_index]
+            dst[i + 1] = lut[color_index + 1]
+
+    def _palette(self, bitmap):
+        """
+        Return the decoder and the palette lookup table of a bitmap module.
+
+        The lookup table holds the palette colors in the byte order sent to
+        the display, it is built once per bitmap and byte order.
 
         Args:
-            font (module): font module to use.
-            text (str): text to write
-            x0 (int): column to start drawing at
-            y0 (int): row to start drawing at
-            color (int): 565 encoded color to use for characters
-            background (int): 565 encoded color to use for background
+            bitmap (bitmap_module): The module containing the bitmap
+
+        Returns:
+            tuple: (decoder, palette lookup table)
         """
-        fg_color = color if self.needs_swap else ((color << 8) & 0xFF00) | (color >> 8)
-        bg_color = (
-            background
-            if self.needs_swap
-            else ((background << 8) & 0xFF00) | (background >> 8)
-        )
+        cached = self._palettes.get(bitmap)
+        if cached is not None and cached[0] == self.needs_swap:
+            return cached[1], cached[2]
 
-        if font.WIDTH == 8:
-            self._text8(font, text, x0, y0, fg_color, bg_color)
+        palette = bitmap.PALETTE
+        lut = bytearray(len(palette) * 2)
+        for i, color in enumerate(palette):
+            struct.pack_into(
+                _ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL,
+                lut,
+                i * 2,
+                color,
+            )
+
+        if _VIPER and bitmap.BPP in (1, 2, 4, 8):
+            decode = self._decode_viper
         else:
-            self._text16(font, text, x0, y0, fg_color, bg_color)
+            decode = self._decode_python
+
+        self._palettes[bitmap] = (self.needs_swap, decode, lut)
+        return decode, lut
 
     def bitmap(self, bitmap, x, y, index=0):
         """
@@ -794,31 +1338,15 @@ class ST7789:
             return
 
         bitmap_size = height * width
-        buffer_len = bitmap_size * 2
         bpp = bitmap.BPP
         bs_bit = bpp * bitmap_size * index  # if index > 0 else 0
-        palette = bitmap.PALETTE
-        needs_swap = self.needs_swap
-        buffer = bytearray(buffer_len)
+        decode, lut = self._palette(bitmap)
+        buffer = self._scratch(bitmap_size * 2)
+        decode(bitmap.BITMAP, bs_bit, bpp, bitmap_size, lut, buffer)
 
-        for i in range(0, buffer_len, 2):
-            color_index = 0
-            for _ in range(bpp):
-                color_index = (color_index << 1) | (
-                    (bitmap.BITMAP[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1
-                )
-                bs_bit += 1
-
-            color = palette[color_index]
-            if needs_swap:
-                buffer[i] = color & 0xFF
-                buffer[i + 1] = color >> 8
-            else:
-                buffer[i] = color >> 8
-                buffer[i + 1] = color & 0xFF
-
-        self._set_window(x, y, to_col, to_row)
-        self._write(None, buffer)
+        with self._transaction:
+            self._set_window(x, y, to_col, to_row)
+            self._write_pixels(buffer)
 
     def pbitmap(self, bitmap, x, y, index=0):
         """
@@ -834,35 +1362,29 @@ class ST7789:
         """
         width = bitmap.WIDTH
         height = bitmap.HEIGHT
-        bitmap_size = height * width
-        bpp = bitmap.BPP
-        bs_bit = bpp * bitmap_size * index  # if index > 0 else 0
-        palette = bitmap.PALETTE
-        needs_swap = self.needs_swap
-        buffer = bytearray(bitmap.WIDTH * 2)
-
-        for row in range(height):
-            for col in range(width):
-                color_index = 0
-                for _ in range(bpp):
-                    color_index <<= 1
-                    color_index |= (
-                        bitmap.BITMAP[bs_bit // 8] & 1 << (7 - (bs_bit % 8))
-                    ) > 0
-                    bs_bit += 1
-                color = palette[color_index]
-                if needs_swap:
-                    buffer[col * 2] = color & 0xFF
-                    buffer[col * 2 + 1] = color >> 8 & 0xFF
-                else:
-                    buffer[col * 2] = color >> 8 & 0xFF
-                    buffer[col * 2 + 1] = color & 0xFF
+        to_col = x + width - 1
+        rows = min(height, self.height - y)
+        if self.width <= to_col or rows <= 0:
+            return
 
-            to_col = x + width - 1
-            to_row = y + row
-            if self.width > to_col and self.height > to_row:
-                self._set_window(x, y + row, to_col, to_row)
-                self._write(None, buffer)
+        bpp = bitmap.BPP
+        bs_bit = bpp * height * width * index  # if index > 0 else 0
+        row_bits = bpp * width
+        decode, lut = self._palette(bitmap)
+        buffer = self._scratch(width * 2)
+
+        # one window for all visible rows, each decoded row is streamed.
+        # Rows with an odd number of pixels can not be streamed in
+        # COLOR_444 mode, they get a window each.
+        per_row = self.color_mode == COLOR_444 and width & 1
+        with self._transaction:
+            self._set_window(x, y, to_col, y + rows - 1)
+            for row in range(rows):
+                if per_row:
+                    self._set_window(x, y + row, to_col, y + row)
+                decode(bitmap.BITMAP, bs_bit, bpp, width, lut, buffer)
+                self._write_pixels(buffer)
+                bs_bit += row_bits
 
     def write(self, font, string, x, y, fg=WHITE, bg=BLACK):
         """
@@ -878,29 +1400,29 @@ class ST7789:
             bg (int): background color, optional, defaults to BLACK
         """
         buffer_len = font.HEIGHT * font.MAX_WIDTH * 2
-        buffer = bytearray(buffer_len)
+        buffer = self._scratch(buffer_len)
         fg_hi = fg >> 8
         fg_lo = fg & 0xFF
 
         bg_hi = bg >> 8
         bg_lo = bg & 0xFF
 
-        for character in string:
-            try:
-                char_index = font.MAP.index(character)
-                offset = char_index * font.OFFSET_WIDTH
-                bs_bit = font.OFFSETS[offset]
-                if font.OFFSET_WIDTH > 1:
-                    bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 1]
+        chars = _font_index(font)[0]
+        bitmaps = font.BITMAPS
+        height = font.HEIGHT
+        to_row = y + height - 1
 
-                if font.OFFSET_WIDTH > 2:
-                    bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 2]
+        with self._transaction:
+            for character in string:
+                glyph = chars.get(character)
+                if glyph is None:
+                    continue
 
-                char_width = font.WIDTHS[char_index]
-                buffer_needed = char_width * font.HEIGHT * 2
+                bs_bit, char_width = glyph
+                buffer_needed = char_width * height * 2
 
                 for i in range(0, buffer_needed, 2):
-                    if font.BITMAPS[bs_bit // 8] & 1 << (7 - (bs_bit % 8)) > 0:
+                    if bitmaps[bs_bit >> 3] & 1 << (7 - (bs_bit & 7)):
                         buffer[i] = fg_hi
                         buffer[i + 1] = fg_lo
                     else:
@@ -910,16 +1432,12 @@ class ST7789:
                     bs_bit += 1
 
                 to_col = x + char_width - 1
-                to_row = y + font.HEIGHT - 1
                 if self.width > to_col and self.height > to_row:
                     self._set_window(x, y, to_col, to_row)
-                    self._write(None, buffer[:buffer_needed])
+                    self._write_pixels(buffer[:buffer_needed])
 
                 x += char_width
 
-            except ValueError:
-                pass
-
     def write_width(self, font, string):
         """
         Returns the width in pixels of the string if it was written with the
@@ -933,16 +1451,51 @@ class ST7789:
             int: The width of the string in pixels
 
         """
+        chars, widths = _font_index(font)
+        width = widths.get(string)
+        if width is not None:
+            return width
+
         width = 0
         for character in string:
-            try:
-                char_index = font.MAP.index(character)
-                width += font.WIDTHS[char_index]
-            except ValueError:
-                pass
+            glyph = chars.get(character)
+            if glyph is not None:
+                width += glyph[1]
 
+        if len(widths) >= _WIDTH_CACHE_SIZE:
+            widths.clear()
+        widths[string] = width
         return width
 
+    @staticmethod
+    def _transform_points(points, x, y, angle, center_x, center_y):
+        """
+        Rotate points around center_x, center_y and move them to x, y.
+
+        Returns:
+            list: list of (x, y) tuples
+        """
+        if angle:
+            cos_a = cos(angle)
+            sin_a = sin(angle)
+            return [
+                (
+                    x
+                    + center_x
+                    + int(
+                        (point[0] - center_x) * cos_a - (point[1] - center_y) * sin_a
+                    ),
+                    y
+                    + center_y
+                    + int(
+                        (point[0] - center_x) * sin_a + (point[1] - center_y) * cos_a
+                    ),
+                )
+                for point in points
+            ]
+
+        return [(x + int((point[0])), y + int((point[1]))) for point in points]
+
     @micropython.native
     def polygon(self, points, x, y, color, angle=0, center_x=0, center_y=0):
         """
@@ -963,32 +1516,92 @@ class ST7789:
         if len(points) < 3:
             raise ValueError("Polygon must have at least 3 points.")
 
-        if angle:
-            cos_a = cos(angle)
-            sin_a = sin(angle)
-            rotated = [
-                (
-                    x
-                    + center_x
-                    + int(
-                        (point[0] - center_x) * cos_a - (point[1] - center_y) * sin_a
-                    ),
-                    y
-                    + center_y
-                    + int(
-                        (point[0] - center_x) * sin_a + (point[1] - center_y) * cos_a
-                    ),
+        rotated = self._transform_points(points, x, y, angle, center_x, center_y)
+
+        with self._transaction:
+            for i in range(1, len(rotated)):
+                self.line(
+                    rotated[i - 1][0],
+                    rotated[i - 1][1],
+                    rotated[i][0],
+                    rotated[i][1],
+                    color,
                 )
-                for point in points
-            ]
-        else:
-            rotated = [(x + int((point[0])), y + int((point[1]))) for point in points]
-
-        for i in range(1, len(rotated)):
-            self.line(
-                rotated[i - 1][0],
-                rotated[i - 1][1],
-                rotated[i][0],
-                rotated[i][1],
-                color,
-            )
+
+    @micropython.native
+    def fill_polygon(self, points, x, y, color, angle=0, center_x=0, center_y=0):
+        """
+        Draw a filled polygon on the display. The polygon is closed
+        automatically and filled scanline by scanline using the even-odd
+        rule, every span is drawn with a single hline().
+
+        Args:
+            points (list): List of points of the polygon.
+            x (int): X-coordinate of the polygon's position.
+            y (int): Y-coordinate of the polygon's position.
+            color (int): 565 encoded color.
+            angle (float): Rotation angle in radians (default: 0).
+            center_x (int): X-coordinate of the rotation center (default: 0).
+            center_y (int): Y-coordinate of the rotation center (default: 0).
+
+        Raises:
+            ValueError: If the polygon has less than 3 points.
+        """
+        if len(points) < 3:
+            raise ValueError("Polygon must have at least 3 points.")
+
+        rotated = self._transform_points(points, x, y, angle, center_x, center_y)
+
+        # edges as (y_top, y_bottom, x_at_top, x_at_bottom, closed), horizontal
+        # edges are covered by their neighbours. An edge covers the rows
+        # y_top to y_bottom - 1, closed edges end in a bottom vertex of the
+        # polygon and cover y_bottom as well, so the last row is drawn.
+        edges = []
+        count = len(rotated)
+        for i in range(count):
+            x0, y0 = rotated[i - 1]
+            x1, y1 = rotated[i]
+            if y0 == y1:
+                continue
+            if y0 < y1:
+                closed = self._next_y(rotated, i, 1) < y1
+            else:
+                closed = self._next_y(rotated, i - 1, -1) < y0
+                x0, y0, x1, y1 = x1, y1, x0, y0
+            edges.append((y0, y1, x0, x1, closed))
+
+        if not edges:
+            return
+
+        y_min = max(0, min(edge[0] for edge in edges))
+        y_max = min(self.height - 1, max(edge[1] for edge in edges))
+        x_max = self.width - 1
+        crossings = []
+
+        with self._transaction:
+            for row in range(y_min, y_max + 1):
+                crossings.clear()
+                for y0, y1, x0, x1, closed in edges:
+                    if y0 <= row < y1 or (closed and row == y1):
+                        crossings.append(x0 + (row - y0) * (x1 - x0) // (y1 - y0))
+                crossings.sort()
+                for i in range(0, len(crossings) - 1, 2):
+                    # spans are clipped to the display, not dropped
+                    start = max(0, crossings[i])
+                    end = min(x_max, crossings[i + 1])
+                    if start <= end:
+                        self.hline(start, row, end - start + 1, color)
+
+    @staticmethod
+    def _next_y(points, index, step):
+        """
+        Return the y of the first point after points[index] in the given
+        direction that is not on the same row.
+        """
+        y = points[index % len(points)][1]
+        for _ in range(len(points)):
+            index += step
+            next_y = points[index % len(points)][1]
+            if next_y != y:
+                return next_y
+        return y
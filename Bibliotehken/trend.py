@@ -0,0 +1,117 @@
+"""
+Hardware scrolled trend strip for the ST7789 driver.
+
+The strip is a band of display rows inside the vertical scrolling area of
+the ST7789. Every sample is drawn as one new row at the bottom of the strip
+and the hardware scroll pointer is advanced, so the older rows move up
+without being redrawn. Each sample costs one row of pixels no matter how
+long the history is.
+
+Only portrait rotation 0 is supported, where the scroll axis runs from the
+top to the bottom of the screen.
+
+Example:
+
+    strip = TrendStrip(tft, 200, 120)
+    moisture = strip.add_series(st7789.BLUE, 0, 100)
+    co2 = strip.add_series(st7789.RED, 400, 2000)
+    strip.clear()
+    strip.append(55, 620)
+
+"""
+
+import st7789py as st7789
+
+# number of lines of the ST7789 frame memory along the scroll axis
+_FRAME_LINES = 320
+
+
+class TrendStrip:
+    """
+    Scrolling chart with one row per sample
+
+    Args:
+        tft (ST7789): display driver **Required**
+        top (int): first display row of the strip **Required**
+        height (int): number of rows (samples) of the strip **Required**
+        background (int): 565 encoded background color
+    """
+
+    def __init__(self, tft, top, height, background=st7789.WHITE):
+        if tft.rotations[tft._rotation][0] & 0xE0:
+            raise ValueError("TrendStrip needs display rotation 0.")
+        if top < 0 or height < 1 or top + height > tft.height:
+            raise ValueError("TrendStrip does not fit on the display.")
+
+        self.tft = tft
+        self.top = top
+        self.height = height
+        self.background = background
+        self._series = []
+        self._position = 0
+
+    def add_series(self, color, minimum, maximum):
+        """
+        Add a data series, values are scaled from minimum to maximum over the
+        width of the display.
+
+        Args:
+            color (int): 565 encoded color of the series
+            minimum (int): value shown at the left edge
+            maximum (int): value shown at the right edge
+
+        Returns:
+            int: index of the series
+        """
+        # [color, minimum, maximum, last x or None]
+        self._series.append([color, minimum, maximum, None])
+        return len(self._series) - 1
+
+    def clear(self):
+        """
+        Define the scrolling area, clear the strip and reset the scroll
+        position.
+        """
+        tft = self.tft
+        # the scroll registers count frame memory lines, not display rows
+        first = self.top + tft.ystart
+        tft.vscrdef(first, self.height, _FRAME_LINES - first - self.height)
+        tft.fill_rect(0, self.top, tft.width, self.height, self.background)
+        self._position = 0
+        tft.vscsad(first)
+        for series in self._series:
+            series[3] = None
+
+    def append(self, *values):
+        """
+        Draw one sample row at the bottom of the strip and scroll the strip
+        up by one row.
+
+        Args:
+            values (int): one value per series, None leaves a gap
+        """
+        tft = self.tft
+        row = self.top + self._position
+        last = tft.width - 1
+
+        tft.begin()
+        tft.hline(0, row, tft.width, self.background)
+        for series, value in zip(self._series, values):
+            if value is None:
+                series[3] = None
+                continue
+
+            color, minimum, maximum, previous = series
+            x = int((value - minimum) * last // (maximum - minimum))
+            x = max(0, min(last, x))
+            # connect to the previous sample so the trace stays continuous
+            if previous is None:
+                previous = x
+            start = min(previous, x)
+            tft.hline(start, row, max(previous, x) - start + 1, color)
+            series[3] = x
+
+        self._position = (self._position + 1) % self.height
+        # the row after the newest one is the oldest and is shown on top
+        tft.vscsad(self.top + tft.ystart + self._position)
+        tft.end()
@@ -0,0 +1,487 @@
+"""
+Rendering and sensor acquisition benchmark.
+
+The display scenarios run the st7789py driver against the simulator from
+st7789_sim.py on CPython. For each of them the median run time and the SPI
+traffic of one run (commands, data bytes, writes, window changes, memory
+writes, selects and peak allocation) are reported as JSON. The frame
+scenarios (names starting with display_farbe) draw with display_farbe() of
+the main program, run in firmware_sim.py with the simulated display.
+
+The acquisition scenarios (names starting with aht_, ens160_ and
+sensor_loop) run the ahtx0 and ens160 drivers against the simulated
+sensors from i2c_sim.py on the virtual clock of Werkzeuge/stubs. For each
+of them the I2C transactions, bytes and bus time of one run and the
+virtual time the caller was blocked in the drivers are reported.
+
+Usage:
+
+    python Werkzeuge/benchmark.py                       print results
+    python Werkzeuge/benchmark.py --output results.json write results
+    python Werkzeuge/benchmark.py --compare             compare with baseline
+    python Werkzeuge/benchmark.py --update              write a new baseline
+
+With --compare the traffic counters have to be equal or lower than in the
+baseline file, otherwise the exit code is 1. Run times differ between
+machines, they are only checked if --time-tolerance is given. The peak
+allocation depends on the CPython version and is only reported.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import types
+
+from st7789_sim import create_display
+import firmware_sim
+import i2c_sim
+
+import st7789py as st7789
+import vga2_16x32
+
+import machine
+import utime
+from ahtx0 import AHT20
+from ens160 import ENS160
+from i2c_bus import I2CBus
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# counters compared against the baseline, lower is better
+COUNTERS = (
+    "commands",
+    "data_bytes",
+    "writes",
+    "window_changes",
+    "memory_writes",
+    "selects",
+)
+
+# counters of the acquisition scenarios, lower is better
+I2C_COUNTERS = (
+    "transactions",
+    "bus_bytes",
+    "bus_us",
+    "blocked_us",
+)
+
+
+def proportional_font(seed=1):
+    """Deterministic converted true-type font module for write()."""
+    rng = random.Random(seed)
+    font = types.ModuleType("benchmark_font")
+    font.MAP = " %.0123456789:BCELTWabdefilmnoprtu"
+    font.HEIGHT = 24
+    font.OFFSET_WIDTH = 2
+    widths = [rng.randint(6, 16) for _ in font.MAP]
+    font.WIDTHS = bytes(widths)
+    font.MAX_WIDTH = max(widths)
+    offsets = []
+    bit = 0
+    for width in widths:
+        offsets.append(bit)
+        bit += width * font.HEIGHT
+    font.OFFSETS = b"".join(offset.to_bytes(2, "big") for offset in offsets)
+    font.BITMAPS = bytes(rng.randrange(256) for _ in range(bit // 8 + 1))
+    return font
+
+
+def icon_bitmap(seed=2, bpp=4, size=32):
+    """Deterministic palette bitmap module for bitmap()."""
+    rng = random.Random(seed)
+    bitmap = types.ModuleType("benchmark_icon")
+    bitmap.WIDTH = size
+    bitmap.HEIGHT = size
+    bitmap.BPP = bpp
+    bitmap.PALETTE = [rng.randrange(0x10000) for _ in range(1 << bpp)]
+    bitmap.BITMAP = bytes(rng.randrange(256) for _ in range(size * size * bpp // 8))
+    return bitmap
+
+
+def _firmware_frames(values, trend=False):
+    """
+    Frames of the main program, drawn by its display_farbe().
+
+    The main program runs for a moment in firmware_sim.py with the simulated
+    display, with its font, Screen and TrendStrip. bild_erstellen() builds
+    one frame per eCO2 value, the runs draw them in turn.
+
+    Args:
+        values (tuple): eCO2 values of the frames, None before the first
+            ENS160 sample
+        trend (bool): add a trend row with every frame
+
+    Returns:
+        tuple: the display and the function drawing the next frame
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        firmware = firmware_sim.run(0, display=True)
+        frames = []
+        for co2 in values:
+            firmware["messwerte"].set("co2", co2)
+            if trend:
+                firmware["verlauf_merken"]()
+            firmware["bild_erstellen"]()
+            frames.append(firmware["bild"])
+    index = [0]
+
+    def run():
+        firmware["display_farbe"](frames[index[0]])
+        index[0] = (index[0] + 1) % len(frames)
+
+    return firmware["tft"], run
+
+
+def _scenarios():
+    """
+    Return (name, setup, options) tuples, setup(tft) returns the function to
+    time, options are extra arguments for the driver.
+    """
+    font = proportional_font()
+    icon = icon_bitmap()
+    triangle = [(0, 0), (100, 20), (40, 90)]
+    gauge = [(0, 0), (60, 4), (60, 8), (0, 12)]
+
+    scenarios = (
+        ("fill", lambda tft: lambda: tft.fill(st7789.BLUE)),
+        ("fill_rect", lambda tft: lambda: tft.fill_rect(10, 160, 200, 32, st7789.RED)),
+        (
+            "text_vga2_16x32",
+            lambda tft: lambda: tft.text(
+                vga2_16x32, "Luft:650 ppm", 10, 120, st7789.BLACK, st7789.GREEN
+            ),
+        ),
+        (
+            "write",
+            lambda tft: lambda: tft.write(
+                font, "Boden: 55 %", 10, 40, st7789.BLACK, st7789.WHITE
+            ),
+        ),
+        ("bitmap", lambda tft: lambda: tft.bitmap(icon, 100, 100)),
+        ("pbitmap", lambda tft: lambda: tft.pbitmap(icon, 100, 100)),
+        ("line", lambda tft: lambda: tft.line(0, 0, 239, 150, st7789.WHITE)),
+        ("polygon", lambda tft: lambda: tft.polygon(triangle, 50, 50, st7789.CYAN)),
+        (
+            "fill_polygon",
+            lambda tft: lambda: tft.fill_polygon(
+                gauge, 120, 100, st7789.MAGENTA, 0.7, 0, 6
+            ),
+        ),
+    )
+    # the 12-bit colour mode for the scenarios that dominate the bus traffic
+    color_444 = {"color_mode": st7789.COLOR_444}
+    return tuple((name, setup, {}) for name, setup in scenarios) + tuple(
+        (name + "_444", setup, color_444)
+        for name, setup in scenarios
+        if name in ("fill", "text_vga2_16x32", "bitmap")
+    )
+
+
+def _frame_scenarios():
+    """
+    Return (name, setup) tuples of frames of the main program, setup()
+    returns the display and the function to time.
+    """
+    return (
+        # one value changes every frame, like the one second refresh
+        ("display_farbe", lambda: _firmware_frames((450, 455))),
+        # the colour band changes, the whole screen is filled
+        ("display_farbe_band", lambda: _firmware_frames((450, 650))),
+        # "--" before the first ENS160 sample and the first value
+        ("display_farbe_first_value", lambda: _firmware_frames((None, 450))),
+        # a new trend row with every frame
+        ("display_farbe_trend", lambda: _firmware_frames((450, 455), trend=True)),
+    )
+
+
+class _Sensors:
+    """
+    Simulated AHT20 and ENS160 on one bus, with the time the caller spends
+    outside the drivers.
+    """
+
+    def __init__(self, soft=False, aht_age_ms=0, ens_interval_ms=0):
+        utime.clock.reset()
+        bus = machine.SoftI2C if soft else machine.I2C
+        self.i2c = bus(0, scl=machine.Pin(7), sda=machine.Pin(6), freq=400000)
+        self.i2c.attach(i2c_sim.FakeAHT20(temperature=21.5, humidity=48.0))
+        self.i2c.attach(i2c_sim.FakeENS160(eco2=650, tvoc=120, aqi=2))
+        self.bus = I2CBus(i2c=self.i2c)
+        self.aht = AHT20(self.bus.device("AHT21"), max_age_ms=aht_age_ms)
+        self.ens = ENS160(self.bus.device("ENS160", min_interval_ms=ens_interval_ms))
+        self.idle_us = 0
+
+    def idle(self, ms):
+        """Let time pass outside the drivers, like the main loop waiting."""
+        utime.clock.advance_ms(ms)
+        self.idle_us += ms * 1000
+
+
+def _aht21_aufgabe(sensors):
+    """
+    aht21_aufgabe() of the main program as a generator that yields the ms
+    it waits: start a conversion, wait 80 ms, poll the status every 10 ms,
+    collect the result and wait 2 s.
+    """
+    aht = sensors.aht
+    while True:
+        aht.start_measurement()
+        yield 80
+        while not aht.measurement_ready():
+            yield 10
+        aht.read_measurement(fixed=True)
+        yield 2000
+
+
+def _alle(period, function):
+    """alle() of the main program as a generator, fixed deadlines."""
+    deadline = utime.ticks_ms()
+    while True:
+        function()
+        deadline = utime.ticks_add(deadline, period)
+        yield max(0, utime.ticks_diff(deadline, utime.ticks_ms()))
+
+
+class _Tasks:
+    """
+    Generator tasks on the virtual clock, each one yields the ms until it
+    runs again. The time between the runs is spent in sensors.idle().
+    """
+
+    def __init__(self, sensors, *tasks):
+        now = utime.ticks_ms()
+        self.sensors = sensors
+        self.tasks = [[now, task] for task in tasks]
+
+    def run(self, ms):
+        """Run the tasks for ms of virtual time."""
+        end = utime.ticks_add(utime.ticks_ms(), ms)
+        while True:
+            entry = min(self.tasks, key=lambda entry: utime.ticks_diff(entry[0], end))
+            deadline = entry[0] if utime.ticks_diff(entry[0], end) < 0 else end
+            wait = utime.ticks_diff(deadline, utime.ticks_ms())
+            if wait > 0:
+                self.sensors.idle(wait)
+            if deadline == end:
+                return
+            entry[0] = utime.ticks_add(utime.ticks_ms(), next(entry[1]))
+
+
+def _acquisition_scenarios():
+    """
+    Return (name, setup) tuples, setup() returns the sensors and the
+    function to time.
+    """
+
+    def measure(soft=False):
+        sensors = _Sensors(soft)
+        return sensors, lambda: sensors.aht.measure()
+
+    def measure_cached():
+        # two seconds of reads every 100 ms, the conversion is reused
+        sensors = _Sensors(aht_age_ms=2000)
+
+        def run():
+            for _ in range(20):
+                sensors.aht.measure()
+                sensors.idle(100)
+
+        return sensors, run
+
+    def nonblocking():
+        # the first two seconds of aht21_aufgabe()
+        sensors = _Sensors()
+        return sensors, lambda: _Tasks(sensors, _aht21_aufgabe(sensors)).run(2000)
+
+    def ens160(interval_ms):
+        # one second of updates every 100 ms
+        sensors = _Sensors(ens_interval_ms=interval_ms)
+
+        def run():
+            for _ in range(10):
+                sensors.ens.update()
+                sensors.idle(100)
+
+        return sensors, run
+
+    def sensor_loop(soft=False):
+        # the first two seconds of the sensor tasks of the main program
+        sensors = _Sensors(soft, aht_age_ms=2000, ens_interval_ms=900)
+
+        def run():
+            _Tasks(sensors, _aht21_aufgabe(sensors), _alle(1000, sensors.ens.get_eco2)).run(2000)
+
+        return sensors, run
+
+    return (
+        ("aht_measure", measure),
+        ("aht_measure_soft", lambda: measure(soft=True)),
+        ("aht_measure_cached", measure_cached),
+        ("aht_nonblocking", nonblocking),
+        ("ens160_update", lambda: ens160(0)),
+        ("ens160_gated", lambda: ens160(1000)),
+        ("sensor_loop", sensor_loop),
+        ("sensor_loop_soft", lambda: sensor_loop(soft=True)),
+    )
+
+
+def _measure_acquisition(sensors, function):
+    """Return the I2C counters of one run of function."""
+    i2c = sensors.i2c
+    clock = utime.clock
+    before = (i2c.transactions, i2c.bytes, i2c.busy_us, clock.us, sensors.idle_us)
+    function()
+    return {
+        "transactions": i2c.transactions - before[0],
+        "bus_bytes": i2c.bytes - before[1],
+        "bus_us": i2c.busy_us - before[2],
+        "blocked_us": clock.us - before[3] - (sensors.idle_us - before[4]),
+    }
+
+
+def _time(function, repeat):
+    """Median host run time of function in ms."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def _measure_display(tft, draw, repeat):
+    """Return the SPI counters of one call of draw and its run time."""
+
+    def function():
+        # a real frame draws elsewhere in between, so every run pays
+        # for its CASET/RASET instead of hitting the window cache
+        tft._invalidate_window()
+        draw()
+
+    # the first run warms the glyph and palette caches, the second one
+    # is measured
+    function()
+    with tft.spi.measure() as stats:
+        function()
+
+    result = {counter: getattr(stats, counter) for counter in COUNTERS}
+    result["alloc_peak"] = stats.alloc_peak
+    result["time_ms"] = _time(function, repeat)
+    return result
+
+
+def run(repeat=5, names=None):
+    """
+    Run the scenarios.
+
+    Args:
+        repeat (int): timed runs per scenario
+        names (list): scenario names to run, all if None
+
+    Returns:
+        dict: results per scenario
+    """
+    results = {}
+    for name, setup, options in _scenarios():
+        if names and name not in names:
+            continue
+
+        tft = create_display(glyph_cache=32 * 1024, buffer_size=4800, **options)
+        results[name] = _measure_display(tft, setup(tft), repeat)
+
+    for name, setup in _frame_scenarios():
+        if names and name not in names:
+            continue
+
+        tft, draw = setup()
+        results[name] = _measure_display(tft, draw, repeat)
+
+    for name, setup in _acquisition_scenarios():
+        if names and name not in names:
+            continue
+
+        sensors, function = setup()
+        function()
+        result = _measure_acquisition(sensors, function)
+        result["time_ms"] = _time(function, repeat)
+        results[name] = result
+    return results
+
+
+def compare(results, baseline, time_tolerance=None):
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (dict): results of run()
+        baseline (dict): results of an earlier run
+        time_tolerance (float): allowed relative increase of time_ms, None
+            skips the time check
+
+    Returns:
+        list: regression messages, empty if there are none
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for counter in COUNTERS + I2C_COUNTERS:
+            if counter in base and counter in result and result[counter] > base[counter]:
+                regressions.append(
+                    "{}: {} {} > {}".format(name, counter, result[counter], base[counter])
+                )
+        if time_tolerance is not None and "time_ms" in base:
+            limit = base["time_ms"] * (1 + time_tolerance)
+            if result["time_ms"] > limit:
+                regressions.append(
+                    "{}: time_ms {} > {:.3f}".format(name, result["time_ms"], limit)
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run, default all")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per scenario")
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline")
+    parser.add_argument("--update", action="store_true", help="write the baseline file")
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        help="allowed relative increase of time_ms, for example 0.5",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.scenarios)
+    text = json.dumps(results, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+    if args.update:
+        with open(args.baseline, "w") as output:
+            output.write(text + "\n")
+
+    if args.compare:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.time_tolerance)
+        for regression in regressions:
+            print("Regression:", regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Host-side checks of the integer conversions and the sensor drivers.
+
+The checks run on CPython against the stubs in Werkzeuge/stubs. The
+functions of the main program are taken from a short run with
+firmware_sim.py, the drivers talk to the simulated sensors of i2c_sim.py
+on the virtual clock. Every check returns a list of failure messages.
+
+Usage:
+
+    python Werkzeuge/checks.py              run all checks
+    python Werkzeuge/checks.py percent      run the checks with "percent" in their name
+
+The exit code is 1 if any check fails.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+
+import firmware_sim
+import i2c_sim
+
+import machine
+import utime
+from ahtx0 import AHT20
+from ens160 import ENS160
+from i2c_bus import I2CBus
+from irrigation import PumpController, Zone
+from soil_sampler import SoilSampler
+
+_FIRMWARE = []
+
+
+def _firmware():
+    """Globals of the main program, started once without output."""
+    if not _FIRMWARE:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _FIRMWARE.append(firmware_sim.run(0))
+    return _FIRMWARE[0]
+
+
+def _tie(value):
+    """True if value is within float noise of a .5 rounding boundary."""
+    return abs(value - int(value) - 0.5) < 1e-6 or abs(value - int(value) + 0.5) < 1e-6
+
+
+def check_percent_rounding():
+    """prozent_aus_rohwert() rounds like the former float formula."""
+    firmware = _firmware()
+    percent = firmware["prozent_aus_rohwert"]
+    dry = firmware["TROCKEN_ROHWERT"]
+    span = firmware["ROHWERT_BEREICH"]
+    failures = []
+    for raw in range(4096):
+        # same calibration points as the integer version
+        exact = max(0, min(100, (dry - raw) / span * 100))
+        if percent(raw) != round(exact) and not _tie(exact):
+            failures.append("raw {}: {} % instead of {} %".format(raw, percent(raw), round(exact)))
+        # the calibration points of the original program, 1.0 V and 2.7 V
+        volts = max(0, min(100, (2.7 - raw / 4095 * 3.3) / (2.7 - 1.0) * 100))
+        if abs(percent(raw) - volts) > 1:
+            failures.append("raw {}: {} % instead of {:.2f} % (volts)".format(raw, percent(raw), volts))
+    return failures
+
+
+def check_percent_thresholds():
+    """percent >= threshold exactly when raw <= rohwert_aus_prozent(threshold)."""
+    firmware = _firmware()
+    percent = firmware["prozent_aus_rohwert"]
+    raw_limit = firmware["rohwert_aus_prozent"]
+    failures = []
+    for threshold in [-5, 0, 0.5] + list(range(1, 101)) + [99.5, 101]:
+        limit = raw_limit(threshold)
+        for raw in range(4096):
+            if (percent(raw) >= threshold) != (raw <= limit):
+                failures.append("threshold {} raw {}: limit {}".format(threshold, raw, limit))
+                break
+    return failures
+
+
+def check_hundredths_rounding():
+    """ganzzahl() rounds hundredths like round() of the float value."""
+    whole = _firmware()["ganzzahl"]
+    failures = []
+    for hundredths in range(-5000, 15000):
+        value = hundredths / 100
+        if whole(hundredths) != round(value) and not _tie(value):
+            failures.append("{}: {} instead of {}".format(hundredths, whole(hundredths), round(value)))
+    return failures
+
+
+def check_sensor_json():
+    """The MQTT payload keeps the fields and number formats Node-RED expects."""
+    firmware = _firmware()
+    daten = json.loads(firmware["sensor_json"]())
+    failures = []
+    for name in ("Bodenfeuchtigkeit", "Luftqualitaet", "Temperatur"):
+        value = daten.get(name)
+        # Luftqualitaet is null before the first ENS160 sample
+        valid = isinstance(value, int) or (name == "Luftqualitaet" and value is None)
+        _expect(failures, valid, "{}: {!r} is not a whole number", name, value)
+    _expect(failures, isinstance(daten.get("Pumpe"), str), "Pumpe: {!r}", daten.get("Pumpe"))
+    return failures
+
+
+def check_aht_fixed_point():
+    """Fixed-point AHT results are the float results cut to hundredths."""
+    sensor = AHT20.__new__(AHT20)
+    failures = []
+    for raw in range(0, 1 << 20, 997):
+        sensor._raw_humidity = raw
+        sensor._raw_temp = raw
+        humidity, temperature = sensor._result(True)
+        float_humidity, float_temperature = sensor._result(False)
+        for name, fixed, value in (
+            ("humidity", humidity, float_humidity),
+            ("temperature", temperature, float_temperature),
+        ):
+            if not 0 <= value * 100 - fixed < 1 + 1e-9:
+                failures.append("raw {}: {} {} for {}".format(raw, name, fixed, value))
+    return failures
+
+
+def _bus(*devices, soft=False):
+    """Fresh virtual clock and a simulated bus with the given devices."""
+    utime.clock.reset()
+    i2c = (machine.SoftI2C if soft else machine.I2C)(0, scl=machine.Pin(7), sda=machine.Pin(6))
+    for device in devices:
+        i2c.attach(device)
+    return i2c
+
+
+def _expect(failures, condition, message, *args):
+    if not condition:
+        failures.append(message.format(*args))
+
+
+def check_ens160_newdat():
+    """Values are decoded only from samples with NEWDAT set."""
+    fake = i2c_sim.FakeENS160(eco2=lambda ms: 400 + ms // 1000, tvoc=80, aqi=2)
+    i2c = _bus(fake)
+    sensor = ENS160(i2c)
+    failures = []
+    _expect(failures, not sensor.update(), "update() before the first sample returned True")
+    _expect(failures, sensor.get_eco2() is None, "eCO2 before the first sample: {}", sensor.eco2)
+    utime.clock.advance_ms(1000)
+    _expect(failures, sensor.update(), "update() missed the first sample")
+    _expect(failures, sensor.eco2 == 401, "eCO2 of the first sample: {}", sensor.eco2)
+    _expect(failures, (sensor.aqi, sensor.tvoc) == (2, 80), "AQI, TVOC: {}", (sensor.aqi, sensor.tvoc))
+    _expect(failures, not sensor.update(), "NEWDAT was not cleared by the data read")
+    utime.clock.advance_ms(1000)
+    _expect(failures, sensor.get_eco2() == 402, "eCO2 of the second sample: {}", sensor.eco2)
+    # one burst read per update(), nothing else touches the data registers
+    _expect(failures, fake.data_reads == 5, "burst reads: {} instead of 5", fake.data_reads)
+    return failures
+
+
+def check_ens160_bus_interval():
+    """The bus reads the ENS160 once per interval and never replays NEWDAT."""
+    i2c = _bus(i2c_sim.FakeENS160(eco2=lambda ms: 400 + ms // 1000))
+    bus = I2CBus(i2c=i2c)
+    sensor = ENS160(bus.device("ENS160", min_interval_ms=900))
+    utime.clock.advance_ms(1000)
+    before = i2c.transactions
+    new = 0
+    for _ in range(10):
+        new += sensor.update()
+        utime.clock.advance_ms(99)
+    failures = []
+    _expect(failures, i2c.transactions - before == 1, "{} transactions in 1 s", i2c.transactions - before)
+    _expect(failures, new == 1, "{} new samples from one sample", new)
+    _expect(failures, sensor.eco2 == 401, "eCO2: {}", sensor.eco2)
+    # polls every second with jitter, as the sensor task of the main program
+    device = bus.device("ENS160")
+    skipped = device.skipped
+    values = []
+    for jitter in (3, -2, 5, 0, -4, 1, 2, -1) * 5:
+        utime.clock.advance_ms(1000 + jitter)
+        if sensor.update():
+            values.append(sensor.eco2)
+    _expect(failures, device.skipped == skipped, "{} polls answered from the last result", device.skipped - skipped)
+    repeated = [value for value, previous in zip(values[1:], values) if value <= previous]
+    _expect(failures, not repeated, "samples reported twice: {}", repeated)
+    _expect(failures, len(values) >= 38, "{} new samples in 40 polls", len(values))
+    return failures
+
+
+def check_aht_busy_polling():
+    """The result is read only after the busy bit is cleared."""
+    fake = i2c_sim.FakeAHT20(temperature=21.5, humidity=48.0)
+    sensor = AHT20(_bus(fake))
+    failures = []
+    try:
+        sensor.read_measurement()
+        failures.append("read_measurement() without a measurement did not raise")
+    except RuntimeError:
+        pass
+    start = utime.clock.us
+    status_reads = fake.status_reads
+    sensor.start_measurement()
+    _expect(failures, sensor.measuring, "measuring not set")
+    polls = 0
+    while not sensor.measurement_ready():
+        utime.clock.advance_ms(10)
+        polls += 1
+    elapsed_ms = (utime.clock.us - start) // 1000
+    _expect(failures, 80 <= elapsed_ms < 90, "ready after {} ms", elapsed_ms)
+    humidity, temperature = sensor.read_measurement(fixed=True)
+    _expect(failures, abs(humidity - 4800) <= 1, "humidity {} hundredths", humidity)
+    _expect(failures, abs(temperature - 2150) <= 1, "temperature {} hundredths", temperature)
+    _expect(failures, not sensor.measuring, "measuring still set")
+    _expect(failures, fake.conversions == 1, "{} conversions", fake.conversions)
+    status_reads = fake.status_reads - status_reads
+    _expect(failures, status_reads == polls + 1, "{} status reads for {} polls", status_reads, polls)
+    return failures
+
+
+def check_aht_measure():
+    """measure() waits for the conversion and reuses young results."""
+    fake = i2c_sim.FakeAHT20(temperature=lambda ms: 20 + ms / 10000, humidity=50.0)
+    sensor = AHT20(_bus(fake), max_age_ms=2000)
+    failures = []
+    start = utime.clock.us
+    humidity, temperature = sensor.measure()
+    elapsed_ms = (utime.clock.us - start) // 1000
+    _expect(failures, elapsed_ms >= 80, "measure() returned after {} ms", elapsed_ms)
+    _expect(failures, abs(humidity - 50.0) < 0.01, "humidity {}", humidity)
+    utime.clock.advance_ms(1000)
+    sensor.measure()
+    _expect(failures, fake.conversions == 1, "young result measured again")
+    utime.clock.advance_ms(1000)
+    humidity, temperature = sensor.measure()
+    _expect(failures, fake.conversions == 2, "old result not measured again")
+    _expect(failures, temperature > 20.1, "temperature {} not updated", temperature)
+    return failures
+
+
+def check_soft_i2c_slower():
+    """The bit-banged bus takes longer for the same measurement."""
+    times = []
+    for soft in (False, True):
+        i2c = _bus(i2c_sim.FakeAHT20(), soft=soft)
+        AHT20(i2c).measure()
+        times.append(i2c.busy_us)
+    failures = []
+    _expect(failures, times[0] < times[1], "bus time hardware {} us, software {} us", *times)
+    return failures
+
+
+def check_zone_reactions():
+    """Only pumps switched on by the lower threshold record a reaction."""
+    utime.clock.reset()
+    sampler = SoilSampler((machine.ADC(machine.Pin(10)),))
+    sampler.completed = utime.ticks_ms()
+    zone = Zone(0, PumpController(machine.Pin(8, machine.Pin.OUT), sampler))
+    zone.upper_raw, zone.lower_raw = 2000, 2600
+    failures = []
+    zone.manual = True
+    zone.update(1500)
+    zone.manual = False
+    zone.update()
+    _expect(failures, not zone.pump.running, "pump still on after manual mode")
+    _expect(failures, zone.pump.reactions == 0, "manual mode recorded {} reactions", zone.pump.reactions)
+    zone.manual = True
+    zone.update(2300)
+    zone.manual = False
+    zone.update()
+    _expect(failures, not zone.pump.running, "pump on between the thresholds after manual mode")
+    zone.update(2700)
+    _expect(failures, zone.pump.running, "pump not switched on above the lower threshold")
+    zone.update(1900)
+    _expect(failures, not zone.pump.running, "pump not switched off at the upper threshold")
+    _expect(failures, zone.pump.reactions == 1, "{} reactions instead of 1", zone.pump.reactions)
+    _expect(failures, zone.pump.last_overshoot == 100, "overshoot {}", zone.pump.last_overshoot)
+    return failures
+
+
+def _checks():
+    return [
+        (name, function)
+        for name, function in sorted(globals().items())
+        if name.startswith("check_") and callable(function)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("names", nargs="*", help="run the checks containing one of these")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for name, function in _checks():
+        if args.names and not any(part in name for part in args.names):
+            continue
+        failures = function()
+        print("{}: {}".format(name, "failed" if failures else "ok"))
+        for failure in failures[:10]:
+            print("    " + failure)
+        failed += bool(failures)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Run the main program on CPython with simulated hardware.
+
+The unchanged "Automatische Pflanzenbewässerung.py" runs against the stubs
+in Werkzeuge/stubs and the simulated sensors from i2c_sim.py. The asyncio
+event loop takes its time from the virtual clock of the utime stub: when
+all tasks wait, the clock jumps to the next deadline instead of sleeping,
+so a minute of firmware time passes in well under a second.
+
+Usage:
+
+    python Werkzeuge/firmware_sim.py                 run 10 s of firmware time
+    python Werkzeuge/firmware_sim.py --seconds 130   run 130 s
+    python Werkzeuge/firmware_sim.py --png bild.png  save the display
+
+At the end the MQTT messages per topic, the I2C transactions and the
+pump statistics are printed. With --png the display of the main program
+draws into the simulator of st7789_sim.py and the last frame is saved.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import selectors
+import sys
+
+import i2c_sim
+from st7789_sim import SimPin, SimSPI
+
+import machine
+import st7789py
+import utime
+
+FIRMWARE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "Automatische Pflanzenbewässerung.py",
+)
+
+
+class _SimulatedST7789(st7789py.ST7789):
+    """ST7789 of the main program with its SPI bus and pins replaced by the simulator."""
+
+    def __init__(self, spi, width, height, reset=None, dc=None, cs=None, backlight=None, **kwargs):
+        dc = SimPin()
+        cs = SimPin(1)
+        super().__init__(
+            SimSPI(dc, cs), width, height, reset=SimPin(1), dc=dc, cs=cs, backlight=SimPin(), **kwargs
+        )
+        self.spi.reset_stats()
+
+
+class _Stop(Exception):
+    """Raised out of the event loop when the run time is over."""
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Selector that advances the virtual clock instead of blocking."""
+
+    def __init__(self, stop_us):
+        super().__init__()
+        self.stop_us = stop_us
+        self.stopped = False
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if events or timeout == 0:
+            return events
+        if not self.stopped and utime.clock.us >= self.stop_us:
+            self.stopped = True
+            raise _Stop()
+        if timeout is None:
+            raise RuntimeError("all tasks wait without a timeout")
+        utime.clock.advance_us(math.ceil(timeout * 1000000))
+        return []
+
+
+class _VirtualEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, stop_us):
+        super().__init__(_VirtualSelector(stop_us))
+        self._clock_resolution = 0.000001
+
+    def time(self):
+        return utime.clock.us / 1000000
+
+
+class _VirtualPolicy(asyncio.DefaultEventLoopPolicy):
+    def __init__(self, stop_us):
+        super().__init__()
+        self.stop_us = stop_us
+
+    def new_event_loop(self):
+        return _VirtualEventLoop(self.stop_us)
+
+
+def run(seconds=10, soil_raw=2048, display=False):
+    """
+    Run the main program for the given firmware time.
+
+    Args:
+        seconds (float): virtual run time in seconds
+        soil_raw (int or function): raw ADC value of the soil sensors, or a
+            function of the virtual time in ms
+        display (bool): draw into the simulated display, its SimSPI is the
+            spi attribute of the tft global
+
+    Returns:
+        dict: the globals of the main program
+    """
+    utime.clock.reset()
+    machine.detach_i2c_devices()
+    machine.attach_i2c_device(i2c_sim.FakeAHT20(temperature=21.5, humidity=48.0))
+    machine.attach_i2c_device(i2c_sim.FakeENS160(eco2=650, tvoc=120, aqi=2))
+    if callable(soil_raw):
+        machine.ADC.DEFAULT_RAW = lambda: soil_raw(utime.clock.us // 1000)
+    else:
+        machine.ADC.DEFAULT_RAW = soil_raw
+
+    with open(FIRMWARE, encoding="utf-8") as source:
+        code = compile(source.read(), FIRMWARE, "exec")
+    namespace = {"__name__": "__main__", "__file__": FIRMWARE}
+
+    # the font file is loaded from the working directory, as on the board
+    cwd = os.getcwd()
+    policy = asyncio.get_event_loop_policy()
+    driver = st7789py.ST7789
+    asyncio.set_event_loop_policy(_VirtualPolicy(int(seconds * 1000000)))
+    os.chdir(i2c_sim._LIBRARIES)
+    if display:
+        st7789py.ST7789 = _SimulatedST7789
+    try:
+        exec(code, namespace)
+    except _Stop:
+        pass
+    finally:
+        st7789py.ST7789 = driver
+        os.chdir(cwd)
+        asyncio.set_event_loop_policy(policy)
+    return namespace
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--seconds", type=float, default=10, help="firmware time in seconds")
+    parser.add_argument("--soil", type=int, default=2048, help="raw ADC value of the soil sensors")
+    parser.add_argument("--png", help="save the last frame of the display to this file")
+    args = parser.parse_args(argv)
+
+    firmware = run(args.seconds, args.soil, display=args.png is not None)
+
+    topics = {}
+    for topic, _ in firmware["client"].published:
+        topics[topic] = topics.get(topic, 0) + 1
+    print("Virtual time: {:.1f} s".format(utime.clock.us / 1000000))
+    for topic, count in sorted(topics.items()):
+        print("MQTT {}: {} messages".format(topic, count))
+    print(firmware["i2c_bus"].report())
+    for zone in firmware["zonen"]:
+        print("Pump zone {}: {}".format(zone.channel, zone.pump.stats()))
+    if args.png:
+        firmware["tft"].spi.save_png(args.png)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
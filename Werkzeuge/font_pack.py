@@ -0,0 +1,97 @@
+"""
+Build a packed font file from an 8 or 16 bit wide bitmap font module.
+
+Only the given characters are packed, so the font on the ESP32 holds just
+the glyphs the program shows. The file format is described in
+Bibliotehken/packed_font.py.
+
+Usage:
+
+    python Werkzeuge/font_pack.py Bibliotehken/vga2_16x32.py out.fnt
+    python Werkzeuge/font_pack.py Bibliotehken/vga2_16x32.py out.fnt --chars "0123456789"
+
+Without --chars the characters used by the main program are packed.
+"""
+
+import argparse
+import importlib.util
+import os
+import struct
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_LIBRARIES = os.path.join(os.path.dirname(_HERE), "Bibliotehken")
+if _LIBRARIES not in sys.path:
+    sys.path.insert(0, _LIBRARIES)
+
+from packed_font import HEADER, HEADER_SIZE, MAGIC  # noqa: E402
+
+# characters shown by display_farbe() in the main program
+DEFAULT_CHARS = " %-.0123456789:BCLTWdefmnoprtu"
+
+
+def load_font(path):
+    """Load a bitmap font module from a file path."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def pack(font, chars):
+    """
+    Pack the glyphs of chars from a bitmap font module.
+
+    Args:
+        font (module): 8 or 16 bit wide bitmap font module
+        chars (str): characters to pack, missing ones are skipped
+
+    Returns:
+        bytes: packed font file
+    """
+    size = font.WIDTH * font.HEIGHT // 8
+    codes = sorted(
+        {ord(char) for char in chars if font.FIRST <= ord(char) < font.LAST}
+    )
+    count = len(codes)
+    data_start = HEADER_SIZE + count * 6
+
+    bitmaps = []
+    positions = {}
+    offsets = []
+    for code in codes:
+        start = (code - font.FIRST) * size
+        bitmap = bytes(font.FONT[start : start + size])
+        # identical glyphs share their bitmap
+        if bitmap not in positions:
+            positions[bitmap] = data_start + len(bitmaps) * size
+            bitmaps.append(bitmap)
+        offsets.append(positions[bitmap])
+
+    return b"".join(
+        [struct.pack(HEADER, MAGIC, font.WIDTH, font.HEIGHT, count)]
+        + [struct.pack(">H", code) for code in codes]
+        + [struct.pack(">I", offset) for offset in offsets]
+        + bitmaps
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("font", help="bitmap font module, e.g. vga2_16x32.py")
+    parser.add_argument("output", help="packed font file to write")
+    parser.add_argument("--chars", default=DEFAULT_CHARS, help="characters to pack")
+    args = parser.parse_args(argv)
+
+    font = load_font(args.font)
+    data = pack(font, args.chars)
+    with open(args.output, "wb") as output:
+        output.write(data)
+    count = struct.unpack(HEADER, data[:HEADER_SIZE])[3]
+    print("{}: {} glyphs, {} bytes".format(args.output, count, len(data)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
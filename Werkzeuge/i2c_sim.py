@@ -0,0 +1,206 @@
+"""
+Register-level simulations of the AHT20 and ENS160 for host-side tests.
+
+The fake devices are attached to the simulated I2C buses of the machine
+stub in Werkzeuge/stubs and answer the unchanged drivers ahtx0.py and
+ens160.py. Their timing follows the datasheets and runs on the virtual
+clock of the utime stub:
+
+- AHT20: a triggered conversion keeps the busy bit set for
+  conversion_ms (80 ms), soft reset and calibration take 20 ms and 10 ms.
+- ENS160: in standard mode a new sample is ready every sample_ms
+  (1000 ms). NEWDAT in DATA_STATUS is set with each sample and cleared
+  when a data register is read.
+
+Importing this module puts Werkzeuge/stubs and Bibliotehken on sys.path.
+The stubs are appended, so real MicroPython modules would win.
+
+Example:
+
+    clock = utime.clock
+    aht = FakeAHT20(temperature=21.5, humidity=48.0)
+    i2c = machine.SoftI2C(scl=machine.Pin(7), sda=machine.Pin(6))
+    i2c.attach(aht)
+    sensor = AHT20(i2c)
+    print(sensor.measure(), clock.us, i2c.transactions)
+
+"""
+
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_STUBS = os.path.join(_HERE, "stubs")
+_LIBRARIES = os.path.join(os.path.dirname(_HERE), "Bibliotehken")
+if _STUBS not in sys.path:
+    sys.path.append(_STUBS)
+if _LIBRARIES not in sys.path:
+    sys.path.insert(0, _LIBRARIES)
+
+import utime  # noqa: E402
+
+# AHT20 status bits and commands
+_AHT_BUSY = 0x80
+_AHT_CALIBRATED = 0x08
+_AHT_TRIGGER = 0xAC
+_AHT_SOFTRESET = 0xBA
+_AHT_INITIALIZE = (0xBE, 0xE1)
+
+# ENS160 registers and bits
+_ENS_PART_ID = 0x00
+_ENS_OPMODE = 0x10
+_ENS_DATA_STATUS = 0x20
+_ENS_DATA_AQI = 0x21
+_ENS_DATA_ECO2 = 0x25
+_ENS_STANDARD = 0x02
+_ENS_STATAS = 0x80
+_ENS_NEWDAT = 0x02
+
+
+def _value(value):
+    """Model values may be numbers or functions of the time in ms."""
+    return value(utime.clock.us // 1000) if callable(value) else value
+
+
+class FakeAHT20:
+    """
+    AHT20 temperature and humidity sensor
+
+    Args:
+        temperature (float or function): degrees Celsius, or a function of
+            the virtual time in ms
+        humidity (float or function): relative humidity in percent, or a
+            function of the virtual time in ms
+        address (int): I2C address
+
+    Attributes:
+        conversions (int): triggered conversions
+        status_reads (int): reads of the status byte only
+    """
+
+    def __init__(self, temperature=21.0, humidity=50.0, address=0x38):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.address = address
+        self.conversion_ms = 80
+        self.calibrated = False
+        self.conversions = 0
+        self.status_reads = 0
+        self._busy_until = 0
+        self._data = bytearray(5)
+        self._pending = None
+
+    def _busy(self):
+        return utime.clock.us < self._busy_until
+
+    def _start(self, ms):
+        self._busy_until = utime.clock.us + ms * 1000
+
+    def write(self, data):
+        command = data[0]
+        if command == _AHT_SOFTRESET:
+            self.calibrated = False
+            self._start(20)
+        elif command in _AHT_INITIALIZE:
+            self.calibrated = True
+            self._start(10)
+        elif command == _AHT_TRIGGER and not self._busy():
+            self.conversions += 1
+            self._start(self.conversion_ms)
+            self._convert()
+
+    def _convert(self):
+        """Encode the model values, the result is readable when not busy."""
+        humidity = int(max(0.0, min(100.0, _value(self.humidity))) * 0x100000 / 100)
+        temperature = int((_value(self.temperature) + 50) * 0x100000 / 200)
+        humidity = max(0, min(0xFFFFF, humidity))
+        temperature = max(0, min(0xFFFFF, temperature))
+        self._pending = bytes(
+            (
+                humidity >> 12,
+                (humidity >> 4) & 0xFF,
+                ((humidity & 0x0F) << 4) | (temperature >> 16),
+                (temperature >> 8) & 0xFF,
+                temperature & 0xFF,
+            )
+        )
+
+    def read(self, length):
+        busy = self._busy()
+        if not busy and self._pending is not None:
+            self._data[:] = self._pending
+            self._pending = None
+        if length == 1:
+            self.status_reads += 1
+        status = (_AHT_BUSY if busy else 0) | (_AHT_CALIBRATED if self.calibrated else 0)
+        return (bytes((status,)) + bytes(self._data))[:length].ljust(length, b"\x00")
+
+
+class FakeENS160:
+    """
+    ENS160 air quality sensor
+
+    Args:
+        eco2 (int or function): equivalent CO2 in ppm, or a function of the
+            virtual time in ms
+        tvoc (int or function): TVOC in ppb
+        aqi (int or function): UBA air quality index 1 to 5
+        address (int): I2C address
+
+    Attributes:
+        samples (int): samples produced so far
+        data_reads (int): reads that included a data register
+    """
+
+    def __init__(self, eco2=450, tvoc=50, aqi=1, address=0x53):
+        self.eco2 = eco2
+        self.tvoc = tvoc
+        self.aqi = aqi
+        self.address = address
+        self.sample_ms = 1000
+        self.samples = 0
+        self.data_reads = 0
+        self.registers = bytearray(256)
+        self.registers[_ENS_PART_ID] = 0x60
+        self.registers[_ENS_PART_ID + 1] = 0x01
+        self._pointer = 0
+        self._mode_since = None
+
+    def _update(self):
+        """Produce the samples that are due by now."""
+        if self._mode_since is None:
+            return
+        due = (utime.clock.us - self._mode_since) // (self.sample_ms * 1000)
+        if due <= self.samples:
+            return
+        self.samples = due
+        eco2 = int(_value(self.eco2))
+        tvoc = int(_value(self.tvoc))
+        registers = self.registers
+        registers[_ENS_DATA_STATUS] = _ENS_STATAS | _ENS_NEWDAT
+        registers[_ENS_DATA_AQI] = int(_value(self.aqi)) & 0x07
+        registers[0x22] = tvoc & 0xFF
+        registers[0x23] = tvoc >> 8
+        registers[0x24] = eco2 & 0xFF
+        registers[0x25] = eco2 >> 8
+
+    def write(self, data):
+        self._pointer = data[0]
+        if len(data) > 1:
+            self.registers[data[0] : data[0] + len(data) - 1] = data[1:]
+            if data[0] == _ENS_OPMODE:
+                standard = data[1] == _ENS_STANDARD
+                self._mode_since = utime.clock.us if standard else None
+                self.samples = 0
+                self.registers[_ENS_DATA_STATUS] = _ENS_STATAS if standard else 0
+
+    def read(self, length):
+        self._update()
+        start = self._pointer
+        data = bytes(self.registers[start : start + length])
+        self._pointer = start + length
+        # reading a data register clears NEWDAT
+        if start <= _ENS_DATA_ECO2 and start + length > _ENS_DATA_AQI:
+            self.data_reads += 1
+            self.registers[_ENS_DATA_STATUS] &= ~_ENS_NEWDAT & 0xFF
+        return data
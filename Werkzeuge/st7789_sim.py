@@ -0,0 +1,455 @@
+"""
+Host-side simulator backend for the st7789py driver.
+
+SimPin and SimSPI replace machine.Pin and machine.SPI. SimSPI decodes the
+CASET, RASET and RAMWR commands sent by the driver into an in-memory RGB565
+frame memory that can be saved as a PNG image, 12-bit pixel data is expanded
+to RGB565. It counts commands, data bytes, window changes and chip selects.
+measure() adds the peak heap allocation of a call, so the rendering cost of
+a frame can be measured on a Linux box.
+
+Example:
+
+    tft = create_display()
+    with tft.spi.measure("text") as stats:
+        tft.text(font, "Temp:21 C", 10, 80)
+    print(stats.as_dict())
+    tft.spi.save_png("frame.png")
+
+Running the module renders sample frames with Screen text fields and
+prints their statistics. The real frames of the main program are drawn by
+firmware_sim.py --png.
+"""
+
+import os
+import struct
+import sys
+import tracemalloc
+import zlib
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_LIBRARIES = os.path.join(os.path.dirname(_HERE), "Bibliotehken")
+if _LIBRARIES not in sys.path:
+    sys.path.insert(0, _LIBRARIES)
+
+import st7789py as st7789  # noqa: E402
+
+# ST7789 commands decoded by the simulator
+_CASET = 0x2A
+_RASET = 0x2B
+_RAMWR = 0x2C
+_MADCTL = 0x36
+_VSCRDEF = 0x33
+_VSCSAD = 0x37
+_COLMOD = 0x3A
+
+# COLMOD control interface format of 12 bits per pixel
+_COLMOD_12BIT = 0x03
+
+# size of the ST7789 frame memory
+FRAME_WIDTH = 240
+FRAME_HEIGHT = 320
+
+
+class SimPin:
+    """
+    Output pin with the machine.Pin methods used by the driver.
+
+    Args:
+        value (int): initial level
+    """
+
+    def __init__(self, value=0):
+        self._value = value
+        self.falls = 0
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        value = 1 if value else 0
+        if self._value and not value:
+            self.falls += 1
+        self._value = value
+        return None
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+
+class Stats:
+    """
+    Counters of the traffic sent to a SimSPI.
+
+    Attributes:
+        commands (int): command bytes sent with DC low
+        data_bytes (int): bytes sent with DC high
+        writes (int): calls of SPI.write()
+        window_changes (int): CASET or RASET commands that changed the window
+        memory_writes (int): RAMWR commands
+        pixels (int): pixels written to the frame memory
+        selects (int): falling edges of the chip select pin
+        alloc_peak (int): peak bytes allocated during measure()
+    """
+
+    FIELDS = (
+        "commands",
+        "data_bytes",
+        "writes",
+        "window_changes",
+        "memory_writes",
+        "pixels",
+        "selects",
+        "alloc_peak",
+    )
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def copy(self):
+        stats = Stats()
+        for field in self.FIELDS:
+            setattr(stats, field, getattr(self, field))
+        return stats
+
+    def since(self, start):
+        """Return the difference between these counters and start."""
+        stats = Stats()
+        for field in self.FIELDS:
+            setattr(stats, field, getattr(self, field) - getattr(start, field))
+        return stats
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        values = ", ".join(
+            "{}={}".format(field, getattr(self, field)) for field in self.FIELDS
+        )
+        return "Stats({})".format(values)
+
+
+class _Measurement:
+    """Context manager returned by SimSPI.measure()."""
+
+    def __init__(self, spi, label):
+        self.spi = spi
+        self.label = label
+        self.stats = Stats()
+        self._start = None
+        self._tracing = False
+
+    def __enter__(self):
+        self._tracing = not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._memory = tracemalloc.get_traced_memory()[0]
+        self._start = self.spi.sync_stats().copy()
+        return self.stats
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._tracing:
+            tracemalloc.stop()
+        stats = self.spi.sync_stats().since(self._start)
+        stats.alloc_peak = max(0, peak - self._memory)
+        for field in Stats.FIELDS:
+            setattr(self.stats, field, getattr(stats, field))
+        if self.label is not None:
+            self.spi.calls[self.label] = self.stats
+
+
+class SimSPI:
+    """
+    SPI bus with a simulated ST7789 attached.
+
+    Args:
+        dc (SimPin): data/command pin of the display **Required**
+        cs (SimPin): chip select pin, optional
+    """
+
+    def __init__(self, dc, cs=None):
+        self.dc = dc
+        self.cs = cs
+        self.stats = Stats()
+        self.calls = {}
+        self.frame = bytearray(FRAME_WIDTH * FRAME_HEIGHT * 2)
+        self.madctl = 0
+        self.colmod = 0x55
+        self.scroll = (0, FRAME_HEIGHT, 0)
+        self.scroll_start = 0
+        self._command = None
+        self._arguments = bytearray()
+        self._window = [0, 0, FRAME_WIDTH - 1, FRAME_HEIGHT - 1]
+        self._x = 0
+        self._y = 0
+        self._pending = bytearray()
+        self._cs_falls = cs.falls if cs else 0
+
+    def write(self, buffer):
+        """Receive bytes from the driver, DC low means command."""
+        stats = self.sync_stats()
+        stats.writes += 1
+
+        if not self.dc.value():
+            for command in bytes(buffer):
+                stats.commands += 1
+                self._start_command(command)
+            return
+
+        stats.data_bytes += len(buffer)
+        if self._command == _RAMWR:
+            self._write_pixels(buffer)
+        else:
+            self._arguments.extend(buffer)
+            self._apply_arguments()
+
+    def sync_stats(self):
+        """Update the select counter from the chip select pin."""
+        if self.cs is not None:
+            self.stats.selects = self.cs.falls - self._cs_falls
+        return self.stats
+
+    def _start_command(self, command):
+        self._command = command
+        self._arguments = bytearray()
+        self._pending = bytearray()
+        if command == _RAMWR:
+            self.stats.memory_writes += 1
+            self._x = self._window[0]
+            self._y = self._window[1]
+
+    def _apply_arguments(self):
+        command = self._command
+        arguments = self._arguments
+        if command in (_CASET, _RASET) and len(arguments) >= 4:
+            start, end = struct.unpack(">HH", arguments[:4])
+            index = 0 if command == _CASET else 1
+            if self._window[index] != start or self._window[index + 2] != end:
+                self.stats.window_changes += 1
+            self._window[index] = start
+            self._window[index + 2] = end
+        elif command == _MADCTL and arguments:
+            self.madctl = arguments[0]
+        elif command == _COLMOD and arguments:
+            self.colmod = arguments[0]
+        elif command == _VSCRDEF and len(arguments) >= 6:
+            self.scroll = struct.unpack(">HHH", arguments[:6])
+        elif command == _VSCSAD and len(arguments) >= 2:
+            self.scroll_start = struct.unpack(">H", arguments[:2])[0]
+
+    def _write_pixels(self, buffer):
+        # the data is not copied, so measure() only sees the driver's
+        # allocations
+        if self.colmod & 0x07 == _COLMOD_12BIT:
+            self._write_pixels_444(buffer)
+            return
+
+        data = memoryview(buffer)
+        length = len(data)
+        i = 0
+        if self._pending and length:
+            high = self._pending[0]
+            low = data[0]
+            self._pending = bytearray()
+            self._store(high, low)
+            i = 1
+        while i + 1 < length:
+            self._store(data[i], data[i + 1])
+            i += 2
+        if i < length:
+            self._pending = bytearray(data[i:])
+
+    def _write_pixels_444(self, buffer):
+        """Two 12-bit pixels in three bytes, expanded to RGB565."""
+        data = memoryview(buffer)
+        length = len(data)
+        i = 0
+        pending = self._pending
+        if pending:
+            needed = 3 - len(pending)
+            if length < needed:
+                pending.extend(data)
+                return
+            pending.extend(data[:needed])
+            self._store_444(pending[0], pending[1], pending[2])
+            self._pending = bytearray()
+            i = needed
+        while i + 2 < length:
+            self._store_444(data[i], data[i + 1], data[i + 2])
+            i += 3
+        if i < length:
+            self._pending = bytearray(data[i:])
+
+    def _store_444(self, byte0, byte1, byte2):
+        for red, green, blue in (
+            (byte0 >> 4, byte0 & 0x0F, byte1 >> 4),
+            (byte1 & 0x0F, byte2 >> 4, byte2 & 0x0F),
+        ):
+            color = red << 12 | (red >> 3) << 11
+            color |= green << 7 | (green >> 2) << 5
+            color |= blue << 1 | blue >> 3
+            self._store(color >> 8, color & 0xFF)
+
+    def _store(self, high, low):
+        """Store one pixel at the write position and advance it."""
+        x0, y0, x1, y1 = self._window
+        if self._y > y1:
+            # the ST7789 wraps to the start of the window
+            self._y = y0
+        position = self._address(self._x, self._y)
+        if position is not None:
+            self.frame[position] = high
+            self.frame[position + 1] = low
+        self.stats.pixels += 1
+        self._x += 1
+        if self._x > x1:
+            self._x = x0
+            self._y += 1
+
+    def _address(self, x, y):
+        """Frame memory offset of a window position, honours MADCTL."""
+        if self.madctl & 0x20:
+            x, y = y, x
+        if self.madctl & 0x40:
+            x = FRAME_WIDTH - 1 - x
+        if self.madctl & 0x80:
+            y = FRAME_HEIGHT - 1 - y
+        if 0 <= x < FRAME_WIDTH and 0 <= y < FRAME_HEIGHT:
+            return (y * FRAME_WIDTH + x) * 2
+        return None
+
+    def measure(self, label=None):
+        """
+        Return a context manager yielding the Stats of the with block. With
+        a label the stats are also kept in calls[label].
+        """
+        return _Measurement(self, label)
+
+    def reset_stats(self):
+        self.stats = Stats()
+        self.calls = {}
+        self._cs_falls = self.cs.falls if self.cs else 0
+
+    def pixel(self, x, y):
+        """RGB565 value of the frame memory at x, y."""
+        position = (y * FRAME_WIDTH + x) * 2
+        return (self.frame[position] << 8) | self.frame[position + 1]
+
+    def visible_rows(self):
+        """Frame memory rows in the order they are shown, scrolling applied."""
+        top, area, bottom = self.scroll
+        rows = list(range(top))
+        if area:
+            start = self.scroll_start - top
+            rows.extend(top + (start + row) % area for row in range(area))
+        rows.extend(range(top + area, FRAME_HEIGHT))
+        return rows
+
+    def save_png(self, path):
+        """
+        Save the visible frame memory as a PNG image, RGB565 is expanded to
+        8 bits per channel.
+        """
+        raw = bytearray()
+        for row in self.visible_rows():
+            raw.append(0)
+            offset = row * FRAME_WIDTH * 2
+            for i in range(offset, offset + FRAME_WIDTH * 2, 2):
+                color = (self.frame[i] << 8) | self.frame[i + 1]
+                red = (color >> 11) & 0x1F
+                green = (color >> 5) & 0x3F
+                blue = color & 0x1F
+                raw.append((red << 3) | (red >> 2))
+                raw.append((green << 2) | (green >> 4))
+                raw.append((blue << 3) | (blue >> 2))
+
+        def chunk(kind, data):
+            block = kind + data
+            return (
+                struct.pack(">I", len(data))
+                + block
+                + struct.pack(">I", zlib.crc32(block) & 0xFFFFFFFF)
+            )
+
+        header = struct.pack(">IIBBBBB", FRAME_WIDTH, FRAME_HEIGHT, 8, 2, 0, 0, 0)
+        with open(path, "wb") as image:
+            image.write(b"\x89PNG\r\n\x1a\n")
+            image.write(chunk(b"IHDR", header))
+            image.write(chunk(b"IDAT", zlib.compress(bytes(raw), 9)))
+            image.write(chunk(b"IEND", b""))
+
+
+def create_display(width=240, height=320, rotation=0, **kwargs):
+    """
+    Create an st7789py.ST7789 driving a simulated display.
+
+    The simulator is available as the spi attribute of the returned driver,
+    its statistics start after the initialisation of the display.
+
+    Args:
+        width (int): display width
+        height (int): display height
+        rotation (int): display rotation
+        kwargs: further arguments for st7789py.ST7789
+
+    Returns:
+        ST7789: driver instance
+    """
+    dc = SimPin()
+    cs = SimPin(1)
+    spi = SimSPI(dc, cs)
+    tft = st7789.ST7789(
+        spi,
+        width,
+        height,
+        reset=SimPin(1),
+        dc=dc,
+        cs=cs,
+        backlight=SimPin(),
+        rotation=rotation,
+        **kwargs
+    )
+    spi.reset_stats()
+    return tft
+
+
+def main():
+    import vga2_16x32 as font
+    from screen import Screen
+
+    tft = create_display(glyph_cache=32 * 1024, buffer_size=4800)
+    screen = Screen(tft, font, height=200)
+    screen.add_field("werte", 10, 40, 14)
+    screen.add_field("temp", 10, 80, 14)
+    screen.add_field("luft", 10, 120, 14)
+    screen.add_field("boden", 10, 160, 14)
+    screen.set_text("werte", "Werte:")
+
+    frames = (
+        ("first frame", st7789.GREEN, 21, 450, 55),
+        ("unchanged frame", st7789.GREEN, 21, 450, 55),
+        ("one value changed", st7789.GREEN, 21, 455, 55),
+        ("colour band change", st7789.YELLOW, 21, 650, 55),
+    )
+    for label, color, temp, co2, moisture in frames:
+        with tft.spi.measure(label):
+            with tft.transaction():
+                screen.background(color)
+                screen.set_text("temp", "Temp:{} C".format(temp))
+                screen.set_text("luft", "Luft:{} ppm".format(co2))
+                screen.set_text("boden", "Boden:{} %".format(moisture))
+
+    for label, stats in tft.spi.calls.items():
+        print("{:20} {}".format(label, stats))
+
+    if len(sys.argv) > 1:
+        tft.spi.save_png(sys.argv[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+MicroPython machine module on CPython.
+
+Enough of Pin, ADC, SPI, Timer, I2C and SoftI2C to import and run the
+drivers and the main program on a PC. Time is taken from the virtual clock
+of the utime stub.
+
+I2C and SoftI2C are simulated buses. Devices (see Werkzeuge/i2c_sim.py)
+are attached to a bus with attach(), or with attach_i2c_device() to every
+bus created afterwards. Every transaction advances the virtual clock by
+its duration on the wire, SoftI2C adds the overhead of bit-banging.
+"""
+
+import utime
+
+# devices attached to every new I2C bus
+_I2C_DEVICES = []
+
+# bit-banged I2C on the ESP32 does not get faster than this, whatever
+# frequency is asked for, and each transaction costs extra setup time
+SOFT_I2C_MAX_HZ = 100000
+SOFT_I2C_OVERHEAD_US = 40
+I2C_OVERHEAD_US = 10
+
+
+def attach_i2c_device(device):
+    """Attach device to every I2C bus created from now on."""
+    _I2C_DEVICES.append(device)
+
+
+def detach_i2c_devices():
+    """Forget the devices given to attach_i2c_device()."""
+    del _I2C_DEVICES[:]
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state):
+    pass
+
+
+def freq(hz=None):
+    return 240000000
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 2
+    PULL_DOWN = 3
+
+    def __init__(self, id, mode=IN, pull=None, value=None):
+        self.id = id
+        self.mode = mode
+        self._value = value or 0
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = 1 if value else 0
+        return None
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+
+class ADC:
+    ATTN_0DB = 0
+    ATTN_2_5DB = 1
+    ATTN_6DB = 2
+    ATTN_11DB = 3
+    WIDTH_9BIT = 0
+    WIDTH_10BIT = 1
+    WIDTH_11BIT = 2
+    WIDTH_12BIT = 3
+
+    # value of new ADCs, a number or a function without arguments
+    DEFAULT_RAW = 2048
+
+    def __init__(self, pin, atten=None):
+        self.pin = pin
+        self.raw = ADC.DEFAULT_RAW  # value returned by read(), set by the tools
+        self.reads = 0
+
+    def atten(self, atten):
+        pass
+
+    def width(self, width):
+        pass
+
+    def read(self):
+        self.reads += 1
+        return self.raw() if callable(self.raw) else self.raw
+
+    def read_u16(self):
+        return self.read() << 4
+
+
+class SPI:
+    def __init__(self, id, baudrate=1000000, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.bytes = 0
+
+    def write(self, buffer):
+        self.bytes += len(buffer)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self.id = id
+        self.period_us = 0
+        self.deadline_us = 0
+        self.mode = self.PERIODIC
+        self._callback = None
+
+    def init(self, mode=PERIODIC, freq=None, period=None, callback=None):
+        self.deinit()
+        self.mode = mode
+        self.period_us = int(1000000 / freq) if freq else int(period * 1000)
+        self.deadline_us = utime.clock.us + self.period_us
+        self._callback = callback
+        utime.clock.timers.append(self)
+
+    def deinit(self):
+        if self in utime.clock.timers:
+            utime.clock.timers.remove(self)
+
+    def fire(self):
+        """Run the callback, called by the virtual clock."""
+        if self.mode == self.PERIODIC:
+            self.deadline_us += self.period_us
+        else:
+            self.deinit()
+        if self._callback is not None:
+            self._callback(self)
+
+
+class I2C:
+    """
+    Simulated I2C bus
+
+    Attributes:
+        transactions (int): number of transactions
+        bytes (int): bytes on the wire, including address and register bytes
+        busy_us (int): time the bus was busy
+    """
+
+    def __init__(self, id=0, scl=None, sda=None, freq=400000, timeout=50000):
+        self.freq = freq
+        self.devices = {}
+        self.transactions = 0
+        self.bytes = 0
+        self.busy_us = 0
+        for device in _I2C_DEVICES:
+            self.attach(device)
+
+    def attach(self, device):
+        self.devices[device.address] = device
+
+    def _hz(self):
+        return self.freq
+
+    def _overhead_us(self):
+        return I2C_OVERHEAD_US
+
+    def _device(self, address, length):
+        """Account one transaction and return the addressed device."""
+        # start, address and data bytes with their acknowledge bits, stop
+        us = self._overhead_us() + (length * 9 + 2) * 1000000 // self._hz()
+        self.transactions += 1
+        self.bytes += length
+        self.busy_us += us
+        utime.clock.advance_us(us)
+        device = self.devices.get(address)
+        if device is None:
+            raise OSError(19)  # ENODEV, no acknowledge
+        return device
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def writeto(self, address, buffer, stop=True):
+        self._device(address, 1 + len(buffer)).write(bytes(buffer))
+        return len(buffer)
+
+    def readfrom(self, address, length, stop=True):
+        return self._device(address, 1 + length).read(length)
+
+    def readfrom_into(self, address, buffer, stop=True):
+        data = self._device(address, 1 + len(buffer)).read(len(buffer))
+        buffer[:] = data
+
+    def writeto_mem(self, address, register, buffer, addrsize=8):
+        self._device(address, 2 + len(buffer)).write(bytes([register]) + bytes(buffer))
+
+    def readfrom_mem(self, address, register, length, addrsize=8):
+        # register write, repeated start and read
+        device = self._device(address, 3 + length)
+        device.write(bytes([register]))
+        return device.read(length)
+
+    def readfrom_mem_into(self, address, register, buffer, addrsize=8):
+        buffer[:] = self.readfrom_mem(address, register, len(buffer))
+
+
+class SoftI2C(I2C):
+    """Bit-banged simulated I2C bus, slower and with more overhead."""
+
+    def _hz(self):
+        return min(self.freq, SOFT_I2C_MAX_HZ)
+
+    def _overhead_us(self):
+        return SOFT_I2C_OVERHEAD_US
@@ -0,0 +1,21 @@
+"""
+MicroPython micropython module on CPython, the code emitters run as
+normal Python.
+"""
+
+
+def const(value):
+    return value
+
+
+def native(function):
+    return function
+
+
+def viper(function):
+    return function
+
+
+def schedule(function, argument):
+    function(argument)
+    return True
@@ -0,0 +1,39 @@
+"""
+MicroPython network module on CPython.
+
+WLAN connects on the first isconnected() after connect(), the tools can
+set connect_checks to let the connection take longer.
+"""
+
+STA_IF = 0
+AP_IF = 1
+
+
+class WLAN:
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self.connect_checks = 1  # isconnected() calls until connected
+        self._active = False
+        self._ssid = None
+        self._checks = 0
+
+    def active(self, active=None):
+        if active is None:
+            return self._active
+        self._active = bool(active)
+        if not self._active:
+            self._ssid = None
+        return None
+
+    def connect(self, ssid, password=None):
+        self._ssid = ssid
+        self._checks = 0
+
+    def isconnected(self):
+        if not self._active or self._ssid is None:
+            return False
+        self._checks += 1
+        return self._checks >= self.connect_checks
+
+    def ifconfig(self):
+        return ("192.168.178.50", "255.255.255.0", "192.168.178.1", "192.168.178.1")
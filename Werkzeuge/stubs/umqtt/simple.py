@@ -0,0 +1,61 @@
+"""
+umqtt.simple on CPython, without a broker.
+
+Published messages are kept in published, the tools hand messages to the
+client with deliver(), check_msg() passes them to the callback.
+"""
+
+
+class MQTTException(Exception):
+    pass
+
+
+class MQTTClient:
+    def __init__(self, client_id, server, port=0, user=None, password=None, keepalive=0, **kwargs):
+        self.client_id = client_id
+        self.server = server
+        self.port = port
+        self.keepalive = keepalive
+        self.connected = False
+        self.subscriptions = []
+        self.published = []  # (topic, message) tuples
+        self._inbox = []
+        self._callback = None
+
+    def set_callback(self, callback):
+        self._callback = callback
+
+    def connect(self, clean_session=True):
+        self.connected = True
+        return 0
+
+    def disconnect(self):
+        self.connected = False
+
+    def ping(self):
+        pass
+
+    def subscribe(self, topic, qos=0):
+        self.subscriptions.append(topic)
+
+    def publish(self, topic, message, retain=False, qos=0):
+        if not self.connected:
+            raise OSError(104)  # ECONNRESET
+        self.published.append((topic, message))
+
+    def deliver(self, topic, message):
+        """Queue a message from the broker for the next check_msg()."""
+        if isinstance(topic, str):
+            topic = topic.encode()
+        if isinstance(message, str):
+            message = message.encode()
+        self._inbox.append((topic, message))
+
+    def check_msg(self):
+        if self._inbox:
+            topic, message = self._inbox.pop(0)
+            if topic in self.subscriptions and self._callback is not None:
+                self._callback(topic, message)
+
+    def wait_msg(self):
+        self.check_msg()
@@ -0,0 +1,88 @@
+"""
+MicroPython utime on CPython, driven by a virtual clock.
+
+The clock only moves when code sleeps or when a simulated bus transaction
+takes time (see machine.py), so runs are deterministic and independent of
+the speed of the PC. Tools read and advance the clock through the clock
+attribute.
+"""
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MASK = _TICKS_PERIOD - 1
+_TICKS_HALF = _TICKS_PERIOD >> 1
+
+
+class VirtualClock:
+    """
+    Microsecond clock that is advanced explicitly
+
+    Timers registered in timers (machine.Timer) fire while the clock is
+    advanced past their deadlines.
+
+    Attributes:
+        us (int): microseconds since the start
+        slept_us (int): microseconds spent in sleep_ms() and sleep_us()
+        timers (list): running machine.Timer objects
+    """
+
+    def __init__(self):
+        self.us = 0
+        self.slept_us = 0
+        self.timers = []
+
+    def advance_us(self, us):
+        target = self.us + int(us)
+        while True:
+            due = None
+            for timer in self.timers:
+                if timer.deadline_us <= target and (due is None or timer.deadline_us < due.deadline_us):
+                    due = timer
+            if due is None:
+                break
+            self.us = max(self.us, due.deadline_us)
+            due.fire()
+        self.us = target
+
+    def advance_ms(self, ms):
+        self.advance_us(ms * 1000)
+
+    def reset(self):
+        self.us = 0
+        self.slept_us = 0
+        self.timers = []
+
+
+clock = VirtualClock()
+
+
+def ticks_ms():
+    return (clock.us // 1000) & _TICKS_MASK
+
+
+def ticks_us():
+    return clock.us & _TICKS_MASK
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MASK
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+
+
+def sleep_us(us):
+    clock.slept_us += us
+    clock.advance_us(us)
+
+
+def sleep_ms(ms):
+    sleep_us(ms * 1000)
+
+
+def sleep(seconds):
+    sleep_us(int(seconds * 1000000))
+
+
+def time():
+    return clock.us // 1000000